@@ -7,11 +7,12 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import warnings
 from PIL import Image
+from utils.assets import image_path
 
 warnings.filterwarnings("ignore")
 st.set_page_config(
     page_title="GW",
-    page_icon="Images\logo.png"
+    page_icon=image_path("logo.png", "icon")
 )
 
 
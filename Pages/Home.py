@@ -1,6 +1,6 @@
 import streamlit as st
 import warnings
-from PIL import Image
+from utils.assets import image_url
 
 warnings.filterwarnings("ignore")
 
@@ -12,9 +12,11 @@ st.set_page_config(
 col1 , col2 = st.columns([0.9,1])
 
 with col1:
-    image = Image.open("Images/logo.png")
-    new_image = image.resize((600, 500))  # width=600, height=400
-    st.image(new_image)
+    # Pre-resized 600x500 variant, served from static/ and cached by the browser
+    st.markdown(
+        f'<img src="{image_url("logo.png", "home")}" alt="GW" style="width:100%; max-width:600px;">',
+        unsafe_allow_html=True
+    )
 
 
 with col2:
@@ -7,14 +7,21 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import warnings
 from PIL import Image
+from utils.scenarios import CostingLayout, get_scenario_store, profit_and_loss
+from utils.snapshots import capture_state
 
 warnings.filterwarnings("ignore")
 
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "Management", "Academics", "Other Expenses", "Calculation"
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "Management", "Academics", "Other Expenses", "Calculation", "Scenarios"
 ])
 
+
+def reset_total_students():
+    # "Total Student" follows the division counts again until edited by hand
+    st.session_state.pop("calc_exist_students", None)
+
 # ----------- TAB 1: MANAGEMENT COSTING -----------
 with tab1:
     st.header("Management Costing")
@@ -180,6 +187,7 @@ with tab4:
                 # value=default_students[div],
                 step=1,
                 key=f"calc_stu_{div}",
+                on_change=reset_total_students,
                 width=200
             )
             # existing_fees_structure[div] = st.number_input(
@@ -194,7 +202,7 @@ with tab4:
         total_students_in_existing_school = sum(existing_student_counts.values())
    
 
-        ex_student_count = st.number_input("Total Student", value=total_students_in_existing_school, width=200)
+        ex_student_count = st.number_input("Total Student", value=total_students_in_existing_school, key="calc_exist_students", width=200)
         ex_total_revenue = st.number_input("Existing School Total Revenue", min_value=0, step=1000, value=0, key="calc_exist_rev", width=200)
         ex_total_costing = st.number_input("Existing School Total Costing", min_value=0, step=1000, value=0, key="calc_exist_cost", width=200)
 
@@ -264,6 +272,98 @@ with tab4:
         st.metric(label="Total Cost", value=Total_Cost)
     with col3:
         st.metric(label="Profit Per Student After All Cost", value=Profit_Per_Student_After_All_Cost)
+
+# ----------- TAB 5: SAVED SCENARIOS -----------
+with tab5:
+    st.header("Saved Scenarios")
+
+    scenario_store = get_scenario_store()
+    layout = CostingLayout(
+        management=tuple((f"sal_{i}", f"month_{i}") for i in range(len(roles))),
+        academics=tuple((f"acad_sal_{i}", f"acad_month_{i}") for i in range(len(academic_roles))),
+        other=tuple(f"other_{label}" for label in other_labels),
+        divisions=tuple((f"calc_stu_{div}", f"calc_fee_{div}") for div in divisions),
+        existing_divisions=tuple(f"calc_stu_{div}" for div in Existing_School_divisions),
+        existing_students="calc_exist_students",
+        existing_revenue="calc_exist_rev",
+        existing_cost="calc_exist_cost",
+    )
+
+    def load_scenario(scenario_id):
+        # Runs before the tabs are drawn, so every input picks up the saved value
+        for key, value in scenario_store.get(scenario_id).inputs.items():
+            st.session_state[key] = value
+
+    def clone_scenario(scenario_id, name):
+        clone_id = scenario_store.clone(scenario_id, name)
+        st.toast(f"Cloned #{scenario_id} as #{clone_id}: {name.strip()}")
+
+    # Save the inputs of all tabs
+    st.subheader("💾 Save Current Inputs")
+    col1, col2 = st.columns(2)
+    with col1:
+        scenario_name = st.text_input("Scenario Name", placeholder="e.g. Plan A - 450 students")
+    with col2:
+        school_name = st.text_input("School", placeholder="e.g. Existing school being acquired")
+    if st.button("Save Scenario", disabled=not (scenario_name.strip() and school_name.strip())):
+        scenario_id = scenario_store.save(scenario_name, school_name, capture_state(layout.keys))
+        st.success(f"Saved scenario #{scenario_id}: {scenario_name.strip()} ({school_name.strip()})")
+
+    # Look up saved scenarios by school and save date
+    st.divider()
+    st.subheader("📂 Saved Scenarios")
+    col1, col2 = st.columns(2)
+    with col1:
+        school_filter = st.selectbox("Filter by School", ["All Schools"] + scenario_store.schools())
+    with col2:
+        saved_between = st.date_input("Saved Between", value=(), help="Leave empty for any date.")
+    start, end = saved_between if len(saved_between) == 2 else (None, None)
+    scenarios = scenario_store.find(None if school_filter == "All Schools" else school_filter, start, end)
+
+    if not scenarios:
+        st.info("No saved scenarios match. Save the current inputs above to start comparing plans.")
+    else:
+        by_id = {s.id: s for s in scenarios}
+        st.dataframe(
+            pd.DataFrame([(s.id, s.name, s.school, s.saved_at.replace("T", " ")) for s in scenarios],
+                         columns=["ID", "Name", "School", "Saved At"]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            chosen_id = st.selectbox("Scenario", list(by_id), format_func=lambda i: by_id[i].label)
+        with col2:
+            clone_name = st.text_input("Clone As", placeholder="Name for the copy")
+        with col3:
+            st.button("Load", on_click=load_scenario, args=(chosen_id,), use_container_width=True,
+                      help="Replace the inputs in every tab with this scenario's.")
+            st.button("Clone", on_click=clone_scenario, args=(chosen_id, clone_name),
+                      disabled=not clone_name.strip(), use_container_width=True)
+
+        # Full P&L for every compared scenario, computed in one vectorised pass
+        st.divider()
+        st.subheader("📊 Compare Scenarios")
+        compared_ids = st.multiselect("Scenarios to Compare", list(by_id), default=list(by_id)[:10],
+                                      format_func=lambda i: by_id[i].label)
+        include_current = st.checkbox("Include current (unsaved) inputs", value=True)
+
+        labels = [by_id[i].label for i in compared_ids]
+        inputs = [by_id[i].inputs for i in compared_ids]
+        if include_current:
+            labels.insert(0, "Current Inputs")
+            inputs.insert(0, capture_state(layout.keys))
+
+        if inputs:
+            results = profit_and_loss(inputs, layout)
+            results.index = labels
+            st.dataframe(results.T.style.format("{:,.0f}", na_rep="-"), use_container_width=True)
+
+            baseline = st.selectbox("Difference From", labels)
+            st.write(f"**Change compared with {baseline}:**")
+            st.dataframe((results - results.loc[baseline]).T.style.format("{:+,.0f}", na_rep="-"), use_container_width=True)
+            st.caption("Breakeven figures are blank for plans that don't make a profit per student.")
  
 
    
\ No newline at end of file
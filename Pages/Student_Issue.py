@@ -1,5 +1,11 @@
 import streamlit as st
 import pandas as pd
+from utils.data_store import hold
+from utils.date_index import BUCKETS, PERIODS, clamp_range, date_index_for, detect_date_columns, period_range, trend_for
+from utils.ingest import load_data, merge_data, skipped_lines
+from utils.merge import merge_report
+from utils.schema import STUDENT_ISSUE_SCHEMA
+from utils.snapshots import capture_state, restore_snapshot, save_snapshot
 
 # Set page configuration
 st.set_page_config(page_title="Student Issues Merger & Filter", layout="wide")
@@ -17,29 +23,46 @@ uploaded_files = st.sidebar.file_uploader(
     help="Upload 2 files with the same structure to merge them"
 )
 
-# Load data function with caching
-@st.cache_data
-def load_data(file):
-    """Load data from uploaded file"""
-    if file.name.endswith('.csv'):
-        df = pd.read_csv(file)
-    else:
-        df = pd.read_excel(file)
-    return df
+PAGE_SLOT = "student_issues"
+STATUS_COLUMN = 'Final Status'
+
+# Widget state saved with a snapshot
+SNAPSHOT_KEYS = [
+    "student_date_column", "student_period", "student_date_range",
+    "student_class", "student_subject", "student_teacher", "student_search",
+]
+
+# Reloaded tab: resume the snapshot in the URL instead of asking for the files again
+snapshot_id = st.query_params.get("snapshot")
+restored = None
+if not uploaded_files and snapshot_id:
+    try:
+        restored = restore_snapshot(PAGE_SLOT, snapshot_id)
+    except FileNotFoundError as e:
+        st.sidebar.error(f"❌ {e}")
 
 # Check if files are uploaded
-if uploaded_files is not None and len(uploaded_files) > 0:
+if (uploaded_files is not None and len(uploaded_files) > 0) or restored is not None:
     
-    # Load all uploaded files
+    # Load all uploaded files (parsed once per server, shared between sessions);
+    # files whose header doesn't match the schema are rejected before parsing
     dataframes = []
     file_names = []
     
-    for file in uploaded_files:
+    if restored is not None:
+        # Memory-mapped from the snapshot file: nothing to parse
+        dataframes.append(restored)
+        file_names.append(f"Snapshot {snapshot_id}")
+        st.sidebar.success(f"✅ Restored snapshot {snapshot_id} ({restored.num_rows} rows)")
+    
+    for file in uploaded_files or []:
         try:
-            df = load_data(file)
-            dataframes.append(df)
+            lease = load_data(file, STUDENT_ISSUE_SCHEMA)
+            dataframes.append(lease)
             file_names.append(file.name)
-            st.sidebar.success(f"✅ Loaded: {file.name} ({len(df)} rows)")
+            st.sidebar.success(f"✅ Loaded: {file.name} ({lease.num_rows} rows)")
+            if skipped_lines(lease.table):
+                st.sidebar.warning(f"⚠️ {file.name}: skipped {skipped_lines(lease.table)} malformed line(s)")
         except Exception as e:
             st.sidebar.error(f"❌ Error loading {file.name}: {str(e)}")
     
@@ -49,43 +72,96 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         st.sidebar.info(f"📊 Total files uploaded: {len(dataframes)}")
         
         # Merge/concatenate all dataframes
+        merged = merge_data(dataframes)
         if len(dataframes) == 1:
-            merged_df = dataframes[0]
             st.info("ℹ️ Only one file uploaded. Showing data from that file.")
         else:
             # Concatenate all dataframes (stack them vertically)
-            merged_df = pd.concat(dataframes, ignore_index=True)
-            st.success(f"✅ Successfully merged {len(dataframes)} files! Total rows: {len(merged_df)}")
+            st.success(f"✅ Successfully merged {len(dataframes)} files! Total rows: {merged.num_rows}")
             
-            # Show merge details
+            # Show merge details: how each file's columns were lined up with the others
             with st.expander("📋 Merge Details"):
-                for i, (name, df) in enumerate(zip(file_names, dataframes), 1):
-                    st.write(f"**File {i}:** {name} - {len(df)} rows")
+                merge_details = merge_report(file_names, [lease.table for lease in dataframes])
+                for i, diff in enumerate(merge_details, 1):
+                    st.write(f"**File {i}:** {diff.name} - {diff.rows} rows")
+                    if diff.renamed:
+                        st.caption("Renamed: " + ", ".join(f"'{a}' → '{b}'" for a, b in diff.renamed.items()))
+                    if diff.missing:
+                        st.caption("Missing (left blank): " + ", ".join(diff.missing))
+                    if diff.cast:
+                        st.caption("Converted: " + ", ".join(f"{c} ({a} → {b})" for c, (a, b) in diff.cast.items()))
+                    if diff.reordered:
+                        st.caption("Columns in a different order (realigned)")
+                if all(diff.clean for diff in merge_details):
+                    st.caption("✅ All files have the same columns and types.")
+        
+        # Keep the shared tables pinned while this session uses them
+        hold(PAGE_SLOT, dataframes + [merged])
         
-        # Now work with the merged dataframe
-        df = merged_df
+        # Now work with the merged dataframe (read-only view of the shared table)
+        df = merged.view()
+        
+        # Date range filter: binary search on a sorted index of the date column
+        df_in_range = df
+        date_column = None
+        date_columns = detect_date_columns(df)
+        if date_columns:
+            st.sidebar.markdown("---")
+            st.sidebar.header("📅 Date Range")
+            date_column = st.sidebar.selectbox('Date Column:', date_columns, key="student_date_column")
+            # Built once per uploaded dataset and shared by every session
+            date_index = date_index_for(merged, date_column, STATUS_COLUMN)
+            
+            if date_index.size > 0:
+                first_date, last_date = date_index.bounds()
+                range_start, range_end = first_date, last_date
+                period = st.sidebar.selectbox('Period:', PERIODS, help="Issues raised in this period.", key="student_period")
+                
+                if period == "Custom Range":
+                    # Seeded through session state so a restored snapshot's range isn't overridden;
+                    # a range picked for a previous upload is clamped to this data's dates
+                    st.session_state["student_date_range"] = clamp_range(
+                        st.session_state.get("student_date_range"), first_date, last_date
+                    )
+                    picked = st.sidebar.date_input(
+                        'Issues Raised Between:',
+                        key="student_date_range",
+                        min_value=first_date,
+                        max_value=last_date
+                    )
+                    # Both ends are needed; keep the full range while the user is still picking
+                    if len(picked) == 2:
+                        range_start, range_end = picked
+                else:
+                    range_start, range_end = period_range(period, first_date, last_date)
+                
+                if (range_start, range_end) != (first_date, last_date):
+                    df_in_range = df.iloc[date_index.positions(range_start, range_end)]
+                    st.sidebar.caption(f"{len(df_in_range):,} issues between {range_start:%d %b %Y} and {range_end:%d %b %Y}")
+            else:
+                date_column = None
         
         st.sidebar.markdown("---")
         st.sidebar.header("🔍 Filter Options")
         
         # Filter 1: Class
         if 'Class' in df.columns:
-            classes = ['All'] + sorted(df['Class'].dropna().unique().tolist())
-            selected_class = st.sidebar.selectbox('Select Class:', classes)
+            classes = ['All'] + sorted(df_in_range['Class'].dropna().unique().tolist())
+            selected_class = st.sidebar.selectbox('Select Class:', classes, key="student_class")
             
             # Apply first filter
             if selected_class != 'All':
-                df_temp = df[df['Class'] == selected_class]
+                df_temp = df_in_range[df_in_range['Class'] == selected_class]
             else:
-                df_temp = df.copy()
+                df_temp = df_in_range
         else:
             st.warning("⚠️ 'Class' column not found!")
-            df_temp = df.copy()
+            df_temp = df_in_range
         
         # Filter 2: Subject (dynamic based on Class)
         if 'Subject' in df.columns:
             subjects = ['All'] + sorted(df_temp['Subject'].dropna().unique().tolist())
-            selected_subject = st.sidebar.selectbox('Select Subject:', subjects)
+            selected_subject = st.sidebar.selectbox('Select Subject:', subjects, key="student_subject")
             
             # Apply second filter
             if selected_subject != 'All':
@@ -97,7 +173,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         # Filter 3: Teacher (dynamic based on Class and Subject)
         if 'Resolver Teacher' in df.columns:
             teachers = ['All'] + sorted(df_temp['Resolver Teacher'].dropna().unique().tolist())
-            selected_teacher = st.sidebar.selectbox('Select Teacher:', teachers)
+            selected_teacher = st.sidebar.selectbox('Select Teacher:', teachers, key="student_teacher")
             
             # Apply third filter
             if selected_teacher != 'All':
@@ -115,6 +191,18 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         st.sidebar.metric("Filtered Records", len(filtered_df))
         st.sidebar.metric("Hidden Records", len(df) - len(filtered_df))
         
+        # Save the merged data and these filters under a short shareable ID
+        st.sidebar.markdown("---")
+        st.sidebar.subheader("💾 Snapshot")
+        current_snapshot = snapshot_id if restored is not None else None
+        if st.sidebar.button("Save Snapshot", use_container_width=True,
+                             help="Reopen this analysis later without re-uploading the files."):
+            with st.spinner("Saving snapshot..."):
+                current_snapshot = save_snapshot(merged, capture_state(SNAPSHOT_KEYS))
+            st.query_params["snapshot"] = current_snapshot
+        if current_snapshot:
+            st.sidebar.caption(f"Snapshot `{current_snapshot}` - reopen with `?snapshot={current_snapshot}`")
+        
         # Main content area
         col1, col2 = st.columns([3, 1])
         
@@ -123,7 +211,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         
         with col2:
             # Search functionality
-            search_term = st.text_input("🔎 Search:", "", placeholder="Search...")
+            search_term = st.text_input("🔎 Search:", placeholder="Search...", key="student_search")
         
         # Apply search filter
         if search_term:
@@ -205,6 +293,19 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             
             with stat_cols[3]:
                 st.metric("Files Merged", len(dataframes))
+            
+            # Issue trends over time
+            if date_column and st.checkbox("📅 Show Issue Trends"):
+                bucket = st.radio("Group by:", list(BUCKETS), horizontal=True)
+                if len(filtered_df) == len(df_in_range):
+                    # Only the date range applies: slice the pre-bucketed counts
+                    trend = date_index.trend(bucket, range_start, range_end)
+                else:
+                    trend = trend_for(filtered_df, date_column, STATUS_COLUMN, bucket)
+                if STATUS_COLUMN not in filtered_df.columns:
+                    trend = trend[["Issues"]]
+                st.write(f"**{bucket} Issues by {date_column}:**")
+                st.line_chart(trend)
         
         else:
             st.warning("⚠️ No matching records found.")
@@ -216,9 +317,18 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             """)
 
 else:
-    # No files uploaded - show instructions
+    # No files uploaded: stop pinning the previous upload's tables, so the store can evict them
+    hold(PAGE_SLOT, [])
+
+    # Show instructions
     st.info("👈 **Please upload files to get started**")
     
+    # Resume a saved analysis without re-uploading
+    resume_id = st.text_input("💾 Resume a snapshot:", placeholder="Snapshot ID, e.g. 3f9c2a71be").strip()
+    if resume_id and resume_id != snapshot_id:
+        st.query_params["snapshot"] = resume_id
+        st.rerun()
+    
     st.markdown("""
     ### 📋 How to Use:
     
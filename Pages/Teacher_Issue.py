@@ -1,5 +1,14 @@
 import streamlit as st
 import pandas as pd
+from utils.charts import TOP_K, breakdown_for, top_k_for
+from utils.data_store import hold
+from utils.date_index import BUCKETS, PERIODS, DateIndex, clamp_range, date_index_for, detect_date_columns, period_range, trend_for
+from utils.export import EXPORT_FORMATS, partitioned_zip
+from utils.ingest import merge_data, skipped_lines
+from utils.merge import merge_report
+from utils.progressive import IngestStatus, cancel_ingest, rerun_on_progress, start_ingest
+from utils.schema import TEACHER_ISSUE_SCHEMA
+from utils.snapshots import capture_state, restore_snapshot, save_snapshot
 
 # Set page configuration
 st.set_page_config(page_title="Student Issues Merger & Filter", layout="wide")
@@ -17,53 +26,141 @@ uploaded_files = st.sidebar.file_uploader(
     help="Upload 2+ files with the same structure to merge them"
 )
 
-# Load data function with caching
-@st.cache_data
-def load_data(file):
-    """Load data from uploaded file"""
-    if file.name.endswith('.csv'):
-        df = pd.read_csv(file)
-    else:
-        df = pd.read_excel(file)
-    return df
+PAGE_SLOT = "teacher_issues"
+STATUS_COLUMN = 'Final Status'
+
+# Widget state saved with a snapshot
+SNAPSHOT_KEYS = [
+    "teacher_date_column", "teacher_period", "teacher_date_range",
+    "teacher_classes", "teacher_subjects", "teacher_teachers",
+    "teacher_issue_types", "teacher_status", "teacher_search",
+]
+
+# Reloaded tab: resume the snapshot in the URL instead of asking for the files again
+snapshot_id = st.query_params.get("snapshot")
+restored = None
+if not uploaded_files:
+    # Files removed: don't keep parsing them in the background
+    cancel_ingest(PAGE_SLOT)
+if not uploaded_files and snapshot_id:
+    try:
+        restored = restore_snapshot(PAGE_SLOT, snapshot_id)
+    except FileNotFoundError as e:
+        st.sidebar.error(f"❌ {e}")
 
 # Check if files are uploaded
-if uploaded_files is not None and len(uploaded_files) > 0:
+if (uploaded_files is not None and len(uploaded_files) > 0) or restored is not None:
+    
+    if restored is not None:
+        # Memory-mapped from the snapshot file: nothing to parse
+        ingest = None
+        status = IngestStatus(done=True, version=0, rows=restored.num_rows, files_total=1,
+                              loaded=[(f"Snapshot {snapshot_id}", restored)])
+    else:
+        # Load all uploaded files on a background worker (parsed once per server,
+        # shared between sessions); a new upload set cancels the previous job.
+        # Files whose header doesn't match the schema are rejected up front.
+        ingest = start_ingest(PAGE_SLOT, uploaded_files, TEACHER_ISSUE_SCHEMA)
+        status = ingest.status()
+    dataframes = [lease for _, lease in status.loaded]
+    file_names = [name for name, _ in status.loaded]
     
-    # Load all uploaded files
-    dataframes = []
-    file_names = []
+    for name, lease in status.loaded:
+        st.sidebar.success(f"✅ Loaded: {name} ({lease.num_rows} rows)")
+        if skipped_lines(lease.table):
+            st.sidebar.warning(f"⚠️ {name}: skipped {skipped_lines(lease.table)} malformed line(s)")
+    for name, error in status.errors:
+        st.sidebar.error(f"❌ Error loading {name}: {error}")
     
-    for file in uploaded_files:
-        try:
-            df = load_data(file)
-            dataframes.append(df)
-            file_names.append(file.name)
-            st.sidebar.success(f"✅ Loaded: {file.name} ({len(df)} rows)")
-        except Exception as e:
-            st.sidebar.error(f"❌ Error loading {file.name}: {str(e)}")
+    if not status.done and status.preview is None:
+        st.info(f"⏳ Reading {status.current_file}...")
+        rerun_on_progress(ingest, status.version)
     
     # Merge the dataframes if multiple files uploaded
-    if len(dataframes) > 0:
+    if len(dataframes) > 0 or status.preview is not None:
         st.sidebar.markdown("---")
-        st.sidebar.info(f"📊 Total files uploaded: {len(dataframes)}")
+        st.sidebar.info(f"📊 Total files uploaded: {status.files_total}")
         
-        # Merge/concatenate all dataframes
-        if len(dataframes) == 1:
-            merged_df = dataframes[0]
-            st.info("ℹ️ Only one file uploaded. Showing data from that file.")
+        if not status.done:
+            # Still parsing: filter a live preview of the rows read so far
+            st.info(f"⏳ Parsing {status.current_file}... showing a live preview of the first {status.rows:,} rows.")
+            st.progress(len(status.loaded) / status.files_total, text=f"{len(status.loaded)} of {status.files_total} files parsed")
+            rerun_on_progress(ingest, status.version)
+            df = status.preview
+            merged = None
         else:
-            # Concatenate all dataframes (stack them vertically)
-            merged_df = pd.concat(dataframes, ignore_index=True)
-            st.success(f"✅ Successfully merged {len(dataframes)} files! Total rows: {len(merged_df)}")
+            # Merge/concatenate all dataframes
+            merged = merge_data(dataframes)
+            if len(dataframes) == 1:
+                st.info("ℹ️ Only one file uploaded. Showing data from that file.")
+            else:
+                # Concatenate all dataframes (stack them vertically)
+                st.success(f"✅ Successfully merged {len(dataframes)} files! Total rows: {merged.num_rows}")
+                
+                # Show merge details: how each file's columns were lined up with the others
+                with st.expander("📋 Merge Details"):
+                    merge_details = merge_report(file_names, [lease.table for lease in dataframes])
+                    for i, diff in enumerate(merge_details, 1):
+                        st.write(f"**File {i}:** {diff.name} - {diff.rows} rows")
+                        if diff.renamed:
+                            st.caption("Renamed: " + ", ".join(f"'{a}' → '{b}'" for a, b in diff.renamed.items()))
+                        if diff.missing:
+                            st.caption("Missing (left blank): " + ", ".join(diff.missing))
+                        if diff.cast:
+                            st.caption("Converted: " + ", ".join(f"{c} ({a} → {b})" for c, (a, b) in diff.cast.items()))
+                        if diff.reordered:
+                            st.caption("Columns in a different order (realigned)")
+                    if all(diff.clean for diff in merge_details):
+                        st.caption("✅ All files have the same columns and types.")
+            
+            # Keep the shared tables pinned while this session uses them
+            hold(PAGE_SLOT, dataframes + [merged])
             
-            # Show merge details
-            with st.expander("📋 Merge Details"):
-                for i, (name, df) in enumerate(zip(file_names, dataframes), 1):
-                    st.write(f"**File {i}:** {name} - {len(df)} rows")
+            # Now work with the merged dataframe (read-only view of the shared table)
+            df = merged.view()
         
-        # Now work with the merged dataframe
-        df = merged_df
+        # Date range filter: binary search on a sorted index of the date column
+        df_in_range = df
+        date_column = None
+        date_columns = detect_date_columns(df)
+        if date_columns:
+            st.sidebar.markdown("---")
+            st.sidebar.header("📅 Date Range")
+            date_column = st.sidebar.selectbox('Date Column:', date_columns, key="teacher_date_column")
+            if merged is not None:
+                # Built once per uploaded dataset and shared by every session
+                date_index = date_index_for(merged, date_column, STATUS_COLUMN)
+            else:
+                date_index = DateIndex(df[date_column], df[STATUS_COLUMN] if STATUS_COLUMN in df.columns else None)
+            
+            if date_index.size > 0:
+                first_date, last_date = date_index.bounds()
+                range_start, range_end = first_date, last_date
+                period = st.sidebar.selectbox('Period:', PERIODS, help="Issues raised in this period.", key="teacher_period")
+                
+                if period == "Custom Range":
+                    # Seeded through session state so a restored snapshot's range isn't overridden;
+                    # a range picked for a previous upload is clamped to this data's dates
+                    st.session_state["teacher_date_range"] = clamp_range(
+                        st.session_state.get("teacher_date_range"), first_date, last_date
+                    )
+                    picked = st.sidebar.date_input(
+                        'Issues Raised Between:',
+                        key="teacher_date_range",
+                        min_value=first_date,
+                        max_value=last_date
+                    )
+                    # Both ends are needed; keep the full range while the user is still picking
+                    if len(picked) == 2:
+                        range_start, range_end = picked
+                else:
+                    range_start, range_end = period_range(period, first_date, last_date)
+                
+                if (range_start, range_end) != (first_date, last_date):
+                    df_in_range = df.iloc[date_index.positions(range_start, range_end)]
+                    st.sidebar.caption(f"{len(df_in_range):,} issues between {range_start:%d %b %Y} and {range_end:%d %b %Y}")
+            else:
+                date_column = None
         
         st.sidebar.markdown("---")
         st.sidebar.header("🔍 Filter Options (Multi-Select)")
@@ -73,19 +170,19 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         if 'Issue In Class' in df.columns:
             selected_classes = st.sidebar.multiselect(
                 'Select Classes:',
-                options=sorted(df['Issue In Class'].dropna().unique().tolist()),
-                default=[],
+                options=sorted(df_in_range['Issue In Class'].dropna().unique().tolist()),
+                key="teacher_classes",
                 help="Select one or more classes. Leave empty to show all classes."
             )
             
             # Apply first filter
             if selected_classes:
-                df_temp = df[df['Issue In Class'].isin(selected_classes)]
+                df_temp = df_in_range[df_in_range['Issue In Class'].isin(selected_classes)]
             else:
-                df_temp = df.copy()
+                df_temp = df_in_range
         else:
             st.warning("⚠️ 'Issue In Class' column not found!")
-            df_temp = df.copy()
+            df_temp = df_in_range
         
         # Multi-select Filter 2: Issue In Subject (dynamic based on Class selection)
         if 'Issue In Subject' in df.columns:
@@ -93,7 +190,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             selected_subjects = st.sidebar.multiselect(
                 'Select Subjects:',
                 options=available_subjects,
-                default=[],
+                key="teacher_subjects",
                 help="Select one or more subjects. Options update based on class selection."
             )
             
@@ -110,7 +207,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             selected_teachers = st.sidebar.multiselect(
                 'Select Teachers:',
                 options=available_teachers,
-                default=[],
+                key="teacher_teachers",
                 help="Select one or more teachers. Options update based on previous selections."
             )
             
@@ -129,7 +226,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             selected_issue_types = st.sidebar.multiselect(
                 'Select Issue Types:',
                 options=available_issue_types,
-                default=[],
+                key="teacher_issue_types",
                 help="Select one or more issue types."
             )
             
@@ -142,7 +239,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             selected_status = st.sidebar.multiselect(
                 'Select Final Status:',
                 options=available_status,
-                default=[],
+                key="teacher_status",
                 help="Select one or more status."
             )
             
@@ -154,6 +251,18 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         if st.sidebar.button("🔄 Reset All Filters", use_container_width=True):
             st.rerun()
         
+        # Save the merged data and these filters under a short shareable ID
+        st.sidebar.markdown("---")
+        st.sidebar.subheader("💾 Snapshot")
+        current_snapshot = snapshot_id if restored is not None else None
+        if st.sidebar.button("Save Snapshot", disabled=merged is None, use_container_width=True,
+                             help="Reopen this analysis later without re-uploading the files."):
+            with st.spinner("Saving snapshot..."):
+                current_snapshot = save_snapshot(merged, capture_state(SNAPSHOT_KEYS))
+            st.query_params["snapshot"] = current_snapshot
+        if current_snapshot:
+            st.sidebar.caption(f"Snapshot `{current_snapshot}` - reopen with `?snapshot={current_snapshot}`")
+        
         # Display filter summary in sidebar
         st.sidebar.markdown("---")
         st.sidebar.subheader("📈 Summary")
@@ -185,7 +294,7 @@ if uploaded_files is not None and len(uploaded_files) > 0:
         
         with col2:
             # Search functionality
-            search_term = st.text_input("🔎 Search:", "", placeholder="Search...")
+            search_term = st.text_input("🔎 Search:", placeholder="Search...", key="teacher_search")
         
         # Apply search filter
         if search_term:
@@ -247,6 +356,35 @@ if uploaded_files is not None and len(uploaded_files) > 0:
                         use_container_width=True
                     )
             
+            # Partitioned export: one file/sheet per teacher, class, ... in a single zip
+            with st.expander("🗂️ Partitioned Export (one file per teacher / class)"):
+                partition_options = [c for c in ['Teachers Name', 'Issue In Class', 'Issue In Subject', 'Issue Type', 'Final Status'] if c in filtered_df.columns]
+                pcol1, pcol2 = st.columns(2)
+                with pcol1:
+                    partition_column = st.selectbox("Split by:", partition_options or list(filtered_df.columns))
+                with pcol2:
+                    export_label = st.selectbox("Export as:", list(EXPORT_FORMATS))
+                export_format = EXPORT_FORMATS[export_label]
+                
+                # Zip is only valid for the exact dataset, rows and choices it was built from;
+                # a live preview is identified by its upload set and how far parsing has got
+                dataset = merged.key if merged is not None else ("preview", ingest.signature, status.version)
+                export_signature = (dataset, partition_column, export_format, hash(filtered_df.index.values.tobytes()))
+                if st.button("📦 Prepare Partitioned Zip", use_container_width=True):
+                    with st.spinner("Writing partitions..."):
+                        zip_bytes, n_parts = partitioned_zip(filtered_df, partition_column, export_format)
+                    st.session_state['partitioned_export'] = (export_signature, zip_bytes, n_parts)
+                
+                prepared = st.session_state.get('partitioned_export')
+                if prepared and prepared[0] == export_signature:
+                    st.download_button(
+                        label=f"📥 Download {prepared[2]} {partition_column} Reports (.zip)",
+                        data=prepared[1],
+                        file_name=f"issues_by_{partition_column.lower().replace(' ', '_')}.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
+            
             # Display statistics
             st.markdown("---")
             st.subheader("📊 Quick Statistics")
@@ -274,22 +412,55 @@ if uploaded_files is not None and len(uploaded_files) > 0:
             
             # Optional: Show distribution charts
             if st.checkbox("📈 Show Data Distribution"):
+                # Top categories plus "Other", counted once per filter state
+                top_k = st.slider("Categories per chart:", min_value=5, max_value=50, value=TOP_K,
+                                  help="The rest are grouped into an 'Other' bar.")
+                # Live previews aren't stored yet, so their counts aren't cached
+                chart_key = merged.key if merged is not None else None
                 chart_col1, chart_col2, chart_col3 = st.columns(3)
                 
                 with chart_col1:
-                    if 'Issue In Class' in filtered_df.columns and len(filtered_df['Issue In Class'].value_counts()) > 0:
+                    if 'Issue In Class' in filtered_df.columns and filtered_df['Issue In Class'].notna().any():
                         st.write("**Distribution by Class:**")
-                        st.bar_chart(filtered_df['Issue In Class'].value_counts())
+                        st.bar_chart(top_k_for(filtered_df, chart_key, 'Issue In Class', top_k), sort=False)
                 
                 with chart_col2:
-                    if 'Issue In Subject' in filtered_df.columns and len(filtered_df['Issue In Subject'].value_counts()) > 0:
+                    if 'Issue In Subject' in filtered_df.columns and filtered_df['Issue In Subject'].notna().any():
                         st.write("**Distribution by Subject:**")
-                        st.bar_chart(filtered_df['Issue In Subject'].value_counts())
+                        st.bar_chart(top_k_for(filtered_df, chart_key, 'Issue In Subject', top_k), sort=False)
                 
                 with chart_col3:
-                    if 'Issue Type' in filtered_df.columns and len(filtered_df['Issue Type'].value_counts()) > 0:
+                    if 'Issue Type' in filtered_df.columns and filtered_df['Issue Type'].notna().any():
                         st.write("**Distribution by Issue Type:**")
-                        st.bar_chart(filtered_df['Issue Type'].value_counts())
+                        st.bar_chart(top_k_for(filtered_df, chart_key, 'Issue Type', top_k), sort=False)
+                
+                # Breakdowns: stacked counts from the same pre-aggregated table
+                breakdown_col1, breakdown_col2 = st.columns(2)
+                
+                with breakdown_col1:
+                    if {'Teachers Name', STATUS_COLUMN} <= set(filtered_df.columns):
+                        st.write("**Teachers by Status:**")
+                        st.bar_chart(breakdown_for(filtered_df, chart_key, 'Teachers Name', STATUS_COLUMN, top_k),
+                                     horizontal=True, sort=False)
+                
+                with breakdown_col2:
+                    if {'Issue In Class', 'Issue In Subject'} <= set(filtered_df.columns):
+                        st.write("**Classes by Subject:**")
+                        st.bar_chart(breakdown_for(filtered_df, chart_key, 'Issue In Class', 'Issue In Subject', top_k),
+                                     sort=False)
+            
+            # Issue trends over time
+            if date_column and st.checkbox("📅 Show Issue Trends"):
+                bucket = st.radio("Group by:", list(BUCKETS), horizontal=True)
+                if len(filtered_df) == len(df_in_range):
+                    # Only the date range applies: slice the pre-bucketed counts
+                    trend = date_index.trend(bucket, range_start, range_end)
+                else:
+                    trend = trend_for(filtered_df, date_column, STATUS_COLUMN, bucket)
+                if STATUS_COLUMN not in filtered_df.columns:
+                    trend = trend[["Issues"]]
+                st.write(f"**{bucket} Issues by {date_column}:**")
+                st.line_chart(trend)
         
         else:
             st.warning("⚠️ No matching records found.")
@@ -308,9 +479,18 @@ if uploaded_files is not None and len(uploaded_files) > 0:
                     st.write(filter_text)
 
 else:
-    # No files uploaded - show instructions
+    # No files uploaded: stop pinning the previous upload's tables, so the store can evict them
+    hold(PAGE_SLOT, [])
+
+    # Show instructions
     st.info("👈 **Please upload files to get started**")
     
+    # Resume a saved analysis without re-uploading
+    resume_id = st.text_input("💾 Resume a snapshot:", placeholder="Snapshot ID, e.g. 3f9c2a71be").strip()
+    if resume_id and resume_id != snapshot_id:
+        st.query_params["snapshot"] = resume_id
+        st.rerun()
+    
     st.markdown("""
     ### 📋 How to Use:
     
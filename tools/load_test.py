@@ -0,0 +1,331 @@
+"""Headless concurrent-session load test for the dashboard pages.
+
+Drives the real page scripts with Streamlit's AppTest (no browser, no
+network): every simulated session uploads synthetic issue files, changes
+filters, searches and edits salaries, and each rerun is timed. All sessions
+share one in-process runtime, so caches and the dataset store behave as
+they do on the deployed server.
+
+    python tools/load_test.py --sessions 10 --iterations 5
+    python tools/load_test.py --pages Teacher_Issue --rows 50000 --format csv
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib import parse
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit import config  # noqa: E402
+from streamlit.delta_generator import DeltaGenerator  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.pages_manager import PagesManager  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+PAGES = ["Home", "Profit_Loss_Calculation", "Student_Issue", "Teacher_Issue"]
+UPLOADS_KEY = "_load_test_uploads"
+
+# Compiled page scripts, shared by every session like the server's own cache.
+# A cache per run recompiles each page on every rerun, and ast.parse isn't
+# safe to run from several threads at once.
+SCRIPT_CACHE = ScriptCache()
+
+
+class SyntheticUpload(io.BytesIO):
+    """Stands in for streamlit's UploadedFile"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.file_id = f"{name}-{len(data)}"
+        self.size = len(data)
+        self.type = "text/csv" if name.endswith(".csv") else "application/octet-stream"
+
+
+class ConcurrentAppTest(AppTest):
+    """AppTest whose runs can overlap.
+
+    Stock AppTest installs a mock Runtime before each run and removes it
+    afterwards, so two sessions can't run at once. Here one runtime is
+    installed up front (see ``install_runtime``) and every run uses it.
+    """
+
+    def _run(self, widget_state=None, timeout=None):
+        if timeout is None:
+            timeout = self.default_timeout
+
+        pages_manager = PagesManager(self._script_path, SCRIPT_CACHE, setup_watcher=False)
+        script_runner = LocalScriptRunner(
+            self._script_path,
+            self.session_state,
+            pages_manager,
+            args=self.args,
+            kwargs=self.kwargs,
+        )
+        # LocalScriptRunner always makes its own cache
+        script_runner._script_cache = SCRIPT_CACHE
+        self._tree = script_runner.run(widget_state, self.query_params, timeout, self._page_hash)
+        self._tree._runner = self
+
+        query_string = script_runner.event_data[-1]["client_state"].query_string
+        self.query_params = parse.parse_qs(query_string)
+        return self
+
+
+def install_runtime():
+    """One simulated server runtime shared by all sessions"""
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    config.get_config_options()
+    config.set_option("global.appTest", True)
+    # AppTest has no file_uploader support; serve each session's synthetic files instead
+    DeltaGenerator.file_uploader = _fake_file_uploader
+
+
+def _fake_file_uploader(self, *args, **kwargs):
+    import streamlit as st
+    uploads = st.session_state.get(UPLOADS_KEY, [])
+    files = [SyntheticUpload(name, data) for name, data in uploads]
+    if kwargs.get("accept_multiple_files"):
+        return files
+    return files[0] if files else None
+
+
+def make_issue_log(rows, seed):
+    """Synthetic issue log with the columns both issue pages filter on"""
+    rng = np.random.default_rng(seed)
+    classes = [f"{n}th" for n in range(6, 13)]
+    subjects = ["Maths", "Science", "SST", "English", "Hindi", "Sanskrit"]
+    teachers = [f"Teacher {i:03d}" for i in range(150)]
+    return pd.DataFrame({
+        "Raised On": pd.Timestamp("2024-04-01") + pd.to_timedelta(rng.integers(0, 540, rows), unit="D"),
+        "Class": rng.choice(classes, rows),
+        "Subject": rng.choice(subjects, rows),
+        "Resolver Teacher": rng.choice(teachers, rows),
+        "Issue In Class": rng.choice(classes, rows),
+        "Issue In Subject": rng.choice(subjects, rows),
+        "Teachers Name": rng.choice(teachers, rows),
+        "Issue Type": rng.choice(["Late", "Absent", "Syllabus", "Behaviour", "Homework"], rows),
+        "Final Status": rng.choice(["Open", "Resolved", "In Progress"], rows),
+        "Remarks": rng.choice(["", "follow up", "parent called", "escalated"], rows),
+    })
+
+
+def make_uploads(files, rows, fmt):
+    uploads = []
+    for i in range(files):
+        df = make_issue_log(rows, seed=i)
+        buffer = io.BytesIO()
+        if fmt == "csv":
+            df.to_csv(buffer, index=False)
+        else:
+            df.to_excel(buffer, index=False)
+        uploads.append((f"issues_{i + 1}.{fmt}", buffer.getvalue()))
+    return uploads
+
+
+def _by_label(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _pick(widget, rng, k=1):
+    options = [o for o in widget.options if o != "All"]
+    return list(rng.choice(options, size=min(k, len(options)), replace=False))
+
+
+# Each step takes (app, rng) and performs one scripted interaction (= one rerun)
+def home_steps():
+    return [lambda at, rng: at.run()]
+
+
+def profit_loss_steps():
+    def change_salary(at, rng):
+        at.number_input(key=f"sal_{rng.integers(0, 7)}").set_value(int(rng.integers(5, 60)) * 1000).run()
+
+    def change_academic_salary(at, rng):
+        at.number_input(key=f"acad_sal_{rng.integers(0, 18)}").set_value(int(rng.integers(5, 30)) * 1000).run()
+
+    def change_expense(at, rng):
+        at.number_input(key="other_Marketing cost").set_value(int(rng.integers(3, 9)) * 100000).run()
+
+    return [change_salary, change_academic_salary, change_expense]
+
+
+def student_issue_steps():
+    def pick_class(at, rng):
+        box = _by_label(at.sidebar.selectbox, "Select Class:")
+        box.set_value(_pick(box, rng)[0]).run()
+
+    def pick_subject(at, rng):
+        box = _by_label(at.sidebar.selectbox, "Select Subject:")
+        box.set_value(_pick(box, rng)[0]).run()
+
+    def search(at, rng):
+        at.text_input[0].input(str(rng.choice(["Teacher 0", "Late", "escalated"]))).run()
+
+    return [pick_class, pick_subject, search]
+
+
+def teacher_issue_steps():
+    def pick_classes(at, rng):
+        _by_label(at.sidebar.multiselect, "Select Teachers:").set_value([])
+        box = _by_label(at.sidebar.multiselect, "Select Classes:")
+        box.set_value(_pick(box, rng, k=2)).run()
+
+    def pick_teachers(at, rng):
+        box = _by_label(at.sidebar.multiselect, "Select Teachers:")
+        box.set_value(_pick(box, rng, k=3)).run()
+
+    def search(at, rng):
+        at.text_input[0].input(str(rng.choice(["Syllabus", "parent", "Maths", ""]))).run()
+
+    def toggle_charts(at, rng):
+        # The chart checkbox only exists when the current filters match rows
+        if len(at.checkbox):
+            at.checkbox[0].set_value(not at.checkbox[0].value)
+        at.run()
+
+    return [pick_classes, pick_teachers, search, toggle_charts]
+
+
+STEPS = {
+    "Home": home_steps,
+    "Profit_Loss_Calculation": profit_loss_steps,
+    "Student_Issue": student_issue_steps,
+    "Teacher_Issue": teacher_issue_steps,
+}
+
+
+def run_session(page, uploads, iterations, timeout, seed):
+    """One simulated user on one page; returns rerun latencies in seconds"""
+    rng = np.random.default_rng(seed)
+    at = ConcurrentAppTest(ROOT / "Pages" / f"{page}.py", default_timeout=timeout)
+    at.session_state[UPLOADS_KEY] = uploads
+
+    latencies = []
+    start = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - start)
+    _raise_on_exception(at, page)
+
+    steps = STEPS[page]()
+    for _ in range(iterations):
+        for step in steps:
+            start = time.perf_counter()
+            step(at, rng)
+            latencies.append(time.perf_counter() - start)
+            _raise_on_exception(at, page)
+    return latencies
+
+
+def _raise_on_exception(at, page):
+    if len(at.exception):
+        raise RuntimeError(f"{page}: {at.exception[0].message}")
+    # A script that fails to start (e.g. doesn't compile) leaves an empty tree, not an exception
+    if not at.main.children and not at.sidebar.children:
+        raise RuntimeError(f"{page}: rendered nothing")
+
+
+def rss_mb():
+    """Current resident set size of this process (the simulated server)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _sample_rss(samples, stop):
+    while not stop.is_set():
+        samples.append(rss_mb())
+        stop.wait(0.2)
+
+
+def run_page(page, args, uploads):
+    rss_samples = [rss_mb()]
+    stop = threading.Event()
+    sampler = threading.Thread(target=_sample_rss, args=(rss_samples, stop), daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futures = [
+            pool.submit(run_session, page, uploads, args.iterations, args.timeout, seed)
+            for seed in range(args.sessions)
+        ]
+        latencies = [lat for f in futures for lat in f.result()]
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    sampler.join()
+    return {
+        "page": page,
+        "reruns": len(latencies),
+        "p50": np.percentile(latencies, 50) * 1000,
+        "p90": np.percentile(latencies, 90) * 1000,
+        "p99": np.percentile(latencies, 99) * 1000,
+        "mean": statistics.fmean(latencies) * 1000,
+        "throughput": len(latencies) / elapsed,
+        "rss_start": rss_samples[0],
+        "rss_peak": max(rss_samples),
+    }
+
+
+def print_report(results, args):
+    print(
+        f"\n{args.sessions} concurrent sessions x {args.iterations} iterations, "
+        f"{args.files} x {args.rows} row {args.format} uploads\n"
+    )
+    header = f"{'page':<26}{'reruns':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'reruns/s':>10}{'RSS MB':>16}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = f"{r['rss_start']:.0f} -> {r['rss_peak']:.0f}"
+        print(
+            f"{r['page']:<26}{r['reruns']:>7}{r['p50']:>9.1f}{r['p90']:>9.1f}{r['p99']:>9.1f}"
+            f"{r['mean']:>9.1f}{r['throughput']:>10.1f}{rss:>16}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5, help="concurrent simulated users per page")
+    parser.add_argument("--iterations", type=int, default=3, help="passes over each page's scripted interactions")
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=PAGES)
+    parser.add_argument("--files", type=int, default=2, help="synthetic files uploaded per session")
+    parser.add_argument("--rows", type=int, default=5000, help="rows per synthetic file")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    args = parser.parse_args()
+
+    # Pages use paths relative to the app root, like `streamlit run Homepage.py`
+    os.chdir(ROOT)
+    install_runtime()
+
+    uploads = make_uploads(args.files, args.rows, args.format)
+    results = [run_page(page, args, uploads) for page in args.pages]
+    print_report(results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Pre-resized image variants for everything in Images/.
+
+Variants are written once (at build time via ``python -m utils.assets`` or
+on first startup) into static/images/, named by the source file's content
+hash. Streamlit serves that folder as static media (see
+.streamlit/config.toml), so the browser caches each variant and pages never
+decode, resample or re-upload the original PNGs on a rerun.
+"""
+import hashlib
+import io
+from pathlib import Path
+
+import streamlit as st
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+IMAGES_DIR = ROOT / "Images"
+CACHE_DIR = ROOT / "static" / "images"
+STATIC_URL = "app/static/images"
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Variant name -> (width, height) the pages ask for
+VARIANT_SIZES = {
+    "home": (600, 500),
+    "icon": (64, 64),
+}
+VARIANT_FORMATS = {"webp": "WEBP", "png": "PNG"}
+
+
+def file_hash(path):
+    """Short content hash of a file"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+
+
+def variant_path(digest, variant, ext):
+    return CACHE_DIR / f"{digest}_{variant}.{ext}"
+
+
+def build_variants(src_dir=IMAGES_DIR):
+    """Write every missing variant and return {file name: {variant: {ext: path}}}"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+
+    for src in sorted(Path(src_dir).iterdir()):
+        if src.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+
+        digest = file_hash(src)
+        wanted = {
+            variant: {ext: variant_path(digest, variant, ext) for ext in VARIANT_FORMATS}
+            for variant in VARIANT_SIZES
+        }
+        manifest[src.name] = wanted
+
+        missing = [(v, e, p) for v, paths in wanted.items() for e, p in paths.items() if not p.exists()]
+        if not missing:
+            continue
+
+        with Image.open(src) as image:
+            image.load()
+            for variant, ext, path in missing:
+                resized = image.resize(VARIANT_SIZES[variant], Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, format=VARIANT_FORMATS[ext])
+                # Write to a temp name first so a concurrent startup never sees a half file
+                tmp = path.with_suffix(path.suffix + ".tmp")
+                tmp.write_bytes(buffer.getvalue())
+                tmp.replace(path)
+
+    return manifest
+
+
+@st.cache_resource
+def image_manifest():
+    """Variant manifest, built once per server process"""
+    return build_variants()
+
+
+def image_url(name, variant, ext="webp"):
+    """Static URL of one variant, safe for the browser to cache forever"""
+    return f"{STATIC_URL}/{image_manifest()[name][variant][ext].name}"
+
+
+def image_path(name, variant, ext="png"):
+    """Path of one variant, e.g. for st.set_page_config(page_icon=...)"""
+    return str(image_manifest()[name][variant][ext])
+
+
+if __name__ == "__main__":
+    for name, variants in build_variants().items():
+        for variant, paths in variants.items():
+            for ext, path in paths.items():
+                print(f"{name} [{variant}/{ext}] -> {path.relative_to(ROOT)}")
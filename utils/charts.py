@@ -0,0 +1,80 @@
+"""Distribution charts cut down to the top categories.
+
+Columns like ``Teachers Name`` or free-text ``Issue Type`` can hold
+thousands of distinct values; charting every one sends thousands of bars
+to the browser on each rerun. These helpers keep the ``k`` largest
+categories and fold the rest into a single "Other" bar, so a chart never
+has more than ``k + 1`` bars whatever the size of the data. Counts for a stored
+dataset are cached per filter state: reruns that don't change the filters
+(e.g. toggling a checkbox) reuse them instead of recounting the rows.
+"""
+import pandas as pd
+import streamlit as st
+
+TOP_K = 15
+OTHER = "Other"
+
+# Breakdowns stack the second column's values; fewer colours stay readable
+TOP_K_STACKED = 8
+
+CACHE_ENTRIES = 64
+
+
+def _fold(counts, k):
+    """Keep the k largest rows of ``counts`` (Series or DataFrame), summing the rest into OTHER"""
+    totals = counts if isinstance(counts, pd.Series) else counts.sum(axis=1)
+    order = totals.sort_values(ascending=False, kind="stable").index
+    counts = counts.loc[order]
+    counts.index = counts.index.astype(str)
+    if len(counts) <= k + 1:
+        return counts
+    top, rest = counts.iloc[:k], counts.iloc[k:].sum()
+    if isinstance(counts, pd.Series):
+        return pd.concat([top, pd.Series({OTHER: rest})])
+    return pd.concat([top, rest.to_frame(OTHER).T])
+
+
+def top_k_counts(values, k=TOP_K):
+    """Counts of the k most frequent values, the rest summed into "Other" """
+    counts = pd.Series(values).value_counts(dropna=True)
+    return _fold(counts.astype("int64"), k).rename("Issues")
+
+
+def breakdown_counts(df, row, column, k=TOP_K, k_column=TOP_K_STACKED):
+    """Issue counts per (row, column) pair as a rows x columns table, both cut to top-K plus "Other" """
+    counts = df.groupby([row, column], observed=True).size().unstack(fill_value=0).astype("int64")
+    counts = _fold(counts, k)
+    return _fold(counts.T, k_column).T
+
+
+def _rows_signature(dataset_key, df):
+    """Identifies a filter state: the stored dataset plus the exact rows left after filtering"""
+    return dataset_key, len(df), hash(df.index.values.tobytes())
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _cached_top_k(_df, signature, column, k):
+    return top_k_counts(_df[column], k)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _cached_breakdown(_df, signature, row, column, k):
+    return breakdown_counts(_df, row, column, k)
+
+
+def top_k_for(df, dataset_key, column, k=TOP_K):
+    """``top_k_counts`` of filtered rows of a stored dataset; ``dataset_key`` None skips the cache.
+
+    The cache is shared by every session, so it is only keyed on store
+    keys (content hashes); live previews have none and are counted directly.
+    """
+    if dataset_key is None:
+        return top_k_counts(df[column], k)
+    return _cached_top_k(df, _rows_signature(dataset_key, df), column, k)
+
+
+def breakdown_for(df, dataset_key, row, column, k=TOP_K):
+    """``breakdown_counts`` of filtered rows of a stored dataset; ``dataset_key`` None skips the cache"""
+    if dataset_key is None:
+        return breakdown_counts(df, row, column, k)
+    return _cached_breakdown(df, _rows_signature(dataset_key, df), row, column, k)
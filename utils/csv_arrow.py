@@ -0,0 +1,115 @@
+"""Multithreaded Arrow CSV reading with encoding and delimiter detection.
+
+CSVs exported from Excel are often not UTF-8 (e.g. cp1252) and may use
+``;`` or tabs. UTF-8 is checked against the whole file (a cp1252 export
+can be plain ASCII for thousands of rows before its first accent); other
+encodings and the delimiter are guessed from a 64 KB sample, then the file is parsed by pyarrow's multithreaded reader straight
+into Arrow columns. Files the Arrow reader rejects can be re-read with
+``read_csv_lenient`` (pandas' python engine, same guesses), which skips
+malformed rows instead of failing and counts them.
+"""
+import codecs
+import csv
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from charset_normalizer import from_bytes
+
+SAMPLE_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+BLOCK_BYTES = 1 << 20
+
+# What Excel and Google Sheets actually export: "CSV UTF-8", the Windows
+# ANSI code page ("CSV"), and UTF-16 ("Unicode Text")
+CANDIDATE_ENCODINGS = ["utf_8", "utf_16", "cp1252", "latin_1"]
+
+
+def _first_non_utf8(data):
+    """Offset of the first byte that isn't valid UTF-8, or None; one pass in BLOCK_BYTES steps"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    view = memoryview(data)
+    for start in range(0, len(data), BLOCK_BYTES):
+        try:
+            decoder.decode(view[start:start + BLOCK_BYTES], final=start + BLOCK_BYTES >= len(data))
+        except UnicodeDecodeError as e:
+            # The decoder may still hold the start of a sequence split across blocks
+            return max(0, start + e.start - len(decoder.getstate()[0]))
+    return None
+
+
+def sniff_csv(data):
+    """(encoding, delimiter) guessed for a CSV file"""
+    sample = data[:SAMPLE_BYTES]
+    if sample.startswith(b"\xef\xbb\xbf"):
+        encoding = "utf-8-sig"
+    else:
+        bad = _first_non_utf8(data)
+        if bad is None:
+            encoding = "utf-8"
+        else:
+            # Guess from the bytes around the first non-UTF-8 one: they tell the encodings apart
+            around = data[max(0, bad - SAMPLE_BYTES // 2):bad + SAMPLE_BYTES // 2]
+            candidates = [c for c in CANDIDATE_ENCODINGS if c != "utf_8"]
+            best = from_bytes(around, cp_isolation=candidates).best()
+            encoding = best.encoding if best is not None else "cp1252"
+
+    text = sample.decode(encoding, errors="ignore")
+    # Only whole lines, so a cut-off last row doesn't confuse the sniffer
+    lines = text.splitlines()[:50]
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ","
+    return encoding, delimiter
+
+
+def _options(encoding, delimiter, block_size=None):
+    read = pacsv.ReadOptions(encoding=encoding, use_threads=True)
+    if block_size:
+        read.block_size = block_size
+    parse = pacsv.ParseOptions(delimiter=delimiter)
+    # Empty cells are missing values, as with pd.read_csv
+    convert = pacsv.ConvertOptions(strings_can_be_null=True)
+    return read, parse, convert
+
+
+def read_csv(data):
+    """Parse a whole CSV file into an Arrow table"""
+    encoding, delimiter = sniff_csv(data)
+    read, parse, convert = _options(encoding, delimiter)
+    return pacsv.read_csv(io.BytesIO(data), read_options=read, parse_options=parse, convert_options=convert)
+
+
+def read_csv_lenient(data):
+    """Slower pandas parse for files the Arrow reader rejects (ragged rows, odd quoting).
+
+    Rows with more fields than the header are left out; how many is kept
+    in ``df.attrs["skipped_lines"]``.
+    """
+    encoding, delimiter = sniff_csv(data)
+    skipped = []
+    df = pd.read_csv(
+        io.BytesIO(data), sep=delimiter, encoding=encoding, encoding_errors="replace", engine="python",
+        on_bad_lines=skipped.append,  # returns None, i.e. drop the line
+    )
+    df.attrs["skipped_lines"] = len(skipped)
+    return df
+
+
+def iter_csv(data):
+    """Stream a CSV file as Arrow tables of about BLOCK_BYTES each"""
+    encoding, delimiter = sniff_csv(data)
+    read, parse, convert = _options(encoding, delimiter, BLOCK_BYTES)
+    reader = pacsv.open_csv(io.BytesIO(data), read_options=read, parse_options=parse, convert_options=convert)
+    for batch in reader:
+        yield pa.Table.from_batches([batch])
+
+
+def sample_csv(data, rows):
+    """Header and first ``rows`` rows as a DataFrame; malformed rows are skipped, as in ``read_csv_lenient``"""
+    encoding, delimiter = sniff_csv(data)
+    return pd.read_csv(
+        io.BytesIO(data), nrows=rows, sep=delimiter, encoding=encoding, encoding_errors="replace", on_bad_lines="skip"
+    )
@@ -0,0 +1,144 @@
+"""Process-wide store of parsed datasets shared by every session and page.
+
+Uploads are parsed once into immutable Arrow tables keyed by a hash of the
+file bytes. Sessions hold a ``Lease`` on the tables they use (kept in
+``st.session_state``), so an entry stays pinned while any live session
+needs it and becomes evictable once those sessions go away. Unpinned
+entries are dropped least-recently-used first when the store grows past
+its memory ceiling.
+"""
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+# Memory ceiling for cached tables, in MB
+DEFAULT_MAX_MB = int(os.environ.get("GW_DATASET_STORE_MB", "1024"))
+
+
+def content_key(data):
+    """Hash of raw file bytes used as the dataset key"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def combined_key(keys):
+    """Key for a dataset built from several others (e.g. a merge)"""
+    return content_key("|".join(keys).encode())
+
+
+class Lease:
+    """A session's hold on one stored table"""
+
+    def __init__(self, key, entry):
+        self.key = key
+        self.table = entry.table
+        self._entry = entry
+
+    @property
+    def num_rows(self):
+        return self.table.num_rows
+
+    def view(self):
+        """Arrow-backed DataFrame over the shared buffers (no copy)"""
+        return self.table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def derive(self, name, build):
+        """Artifact computed once per stored table (indexes, aggregates, ...)"""
+        derived = self._entry.derived
+        if name not in derived:
+            derived[name] = build(self.table)
+        return derived[name]
+
+
+class _Entry:
+    def __init__(self, table):
+        self.table = table
+        self.nbytes = table.nbytes
+        self.derived = {}
+        # Leases die with the session state holding them, which unpins the entry
+        self.leases = weakref.WeakSet()
+
+
+class DatasetStore:
+    """Reference-counted, memory-capped cache of immutable Arrow tables"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def lease(self, key, loader):
+        """Return a lease on ``key``, building the table with ``loader`` on a miss"""
+        with self._lock:
+            entry = self._touch(key)
+            if entry is None:
+                key_lock = self._loading.setdefault(key, threading.Lock())
+
+        if entry is None:
+            # Only one session parses a given file; the rest wait and reuse it
+            with key_lock:
+                with self._lock:
+                    entry = self._touch(key)
+                if entry is None:
+                    table = loader()
+                    with self._lock:
+                        entry = self._entries.setdefault(key, _Entry(table))
+                        self._entries.move_to_end(key)
+                        self._loading.pop(key, None)
+
+        with self._lock:
+            lease = Lease(key, entry)
+            entry.leases.add(lease)
+            self._evict()
+        return lease
+
+    def get(self, key):
+        """Lease on ``key`` if it is already stored, else None"""
+        with self._lock:
+            entry = self._touch(key)
+            if entry is None:
+                return None
+            lease = Lease(key, entry)
+            entry.leases.add(lease)
+            return lease
+
+    def stats(self):
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "pinned": sum(1 for e in self._entries.values() if len(e.leases)),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _touch(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self):
+        used = sum(e.nbytes for e in self._entries.values())
+        for key in list(self._entries):
+            if used <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if len(entry.leases) == 0:
+                used -= entry.nbytes
+                del self._entries[key]
+
+
+@st.cache_resource
+def get_store():
+    """The single store shared by all sessions in this server process"""
+    return DatasetStore(DEFAULT_MAX_MB * 1024 * 1024)
+
+
+def hold(slot, leases):
+    """Keep ``leases`` alive for this session, releasing whatever ``slot`` held before"""
+    st.session_state[f"_dataset_leases_{slot}"] = list(leases)
@@ -0,0 +1,209 @@
+"""Sorted date index and pre-bucketed issue trends for issue logs.
+
+For a date column, ``DateIndex`` keeps the row positions sorted by date, so
+a date-range filter is two binary searches plus a slice instead of a
+comparison over the whole column. Daily, weekly and monthly issue counts
+(total / open / resolved) are aggregated once when the index is built;
+trend queries for a date range slice those aggregates for the whole
+periods inside it and count only the rows of the partial periods at its
+two ends.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Share of sampled values that must parse for a text column to count as dates
+MIN_PARSED_SHARE = 0.8
+SAMPLE_ROWS = 200
+DATE_NAME_HINTS = ("date", "time", "day", "raised", "created", "resolved", "closed", "updated", "on")
+
+# Status values matching this count as resolved ("Unresolved", "Incomplete", ... don't)
+RESOLVED_PATTERN = r"(?<!un)(?<!not )resolv|(?<!not )closed|(?<!not )done|(?<!in)complete|(?<!not )fixed"
+
+# Label -> pandas period alias
+BUCKETS = {"Daily": "D", "Weekly": "W", "Monthly": "M"}
+
+PERIODS = ["All Dates", "This Week", "This Month", "Last 30 Days", "Custom Range"]
+
+
+def _is_date_dtype(dtype):
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_timestamp(dtype.pyarrow_dtype) or pa.types.is_date(dtype.pyarrow_dtype)
+    return pd.api.types.is_datetime64_any_dtype(dtype)
+
+
+def _is_text_dtype(dtype):
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return dtype == object
+
+
+def _parse_dates(values):
+    # Day-first, as dates are typed in India (e.g. 05/08/2025 is 5 August)
+    return pd.to_datetime(values, errors="coerce", dayfirst=True, format="mixed")
+
+
+def detect_date_columns(df):
+    """Columns holding dates: real date/timestamp columns, or date-named text columns that parse"""
+    found = []
+    for col in df.columns:
+        dtype = df[col].dtype
+        if _is_date_dtype(dtype):
+            found.append(col)
+        elif _is_text_dtype(dtype) and any(hint in str(col).lower().split() for hint in DATE_NAME_HINTS):
+            sample = df[col].dropna().head(SAMPLE_ROWS)
+            if len(sample) and _parse_dates(sample.astype(str)).notna().mean() >= MIN_PARSED_SHARE:
+                found.append(col)
+    return found
+
+
+def _as_datetime64(values):
+    """numpy datetime64[ns] array (NaT for missing/unparseable)"""
+    series = pd.Series(values)
+    if isinstance(series.dtype, pd.ArrowDtype) and pa.types.is_date(series.dtype.pyarrow_dtype):
+        # Arrow dates (how pyarrow reads ISO dates from CSV) have no time zone;
+        # ``.dt.tz`` isn't even supported for them
+        return series.astype("datetime64[ns]").to_numpy()
+    if _is_date_dtype(series.dtype):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_localize(None)
+        return series.astype("datetime64[ns]").to_numpy()
+    return _parse_dates(series.astype(str).where(series.notna())).to_numpy(dtype="datetime64[ns]")
+
+
+def is_resolved(status):
+    """Boolean array: which status values mean the issue is resolved"""
+    status = pd.Series(status)
+    text = status.astype(str).str.lower()
+    return text.str.contains(RESOLVED_PATTERN, regex=True, na=False).to_numpy(dtype=bool) & status.notna().to_numpy(dtype=bool)
+
+
+def _period_starts(dates, freq):
+    days = dates.astype("datetime64[D]")
+    if freq == "D":
+        return days
+    if freq == "W":
+        # Weeks start on Monday; 1970-01-01 was a Thursday
+        return days - (days.astype(np.int64) + 3) % 7
+    return dates.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _bucket_counts(dates, resolved, freq):
+    """Issues / Resolved / Open per period for datetime64 values"""
+    starts, inverse = np.unique(_period_starts(dates, freq), return_inverse=True)
+    issues = np.bincount(inverse, minlength=len(starts))
+    closed = np.bincount(inverse, weights=resolved, minlength=len(starts)).astype(np.int64)
+    return pd.DataFrame(
+        {"Issues": issues, "Open": issues - closed, "Resolved": closed},
+        index=pd.DatetimeIndex(starts.astype("datetime64[ns]"), name="Period"),
+    )
+
+
+class DateIndex:
+    """Row positions of a table sorted by one date column"""
+
+    def __init__(self, values, status=None):
+        dates = _as_datetime64(values)
+        valid = ~np.isnat(dates)
+        positions = np.flatnonzero(valid)
+        order = np.argsort(dates[valid], kind="stable")
+
+        self.positions_sorted = positions[order]
+        self.dates_sorted = dates[valid][order]
+
+        self.resolved_sorted = np.zeros(len(self.positions_sorted), dtype=bool)
+        if status is not None:
+            self.resolved_sorted = is_resolved(status)[self.positions_sorted]
+        self.buckets = {
+            label: _bucket_counts(self.dates_sorted, self.resolved_sorted, freq) for label, freq in BUCKETS.items()
+        }
+
+    @property
+    def size(self):
+        return len(self.dates_sorted)
+
+    def bounds(self):
+        """(first date, last date) present in the column"""
+        return pd.Timestamp(self.dates_sorted[0]).date(), pd.Timestamp(self.dates_sorted[-1]).date()
+
+    def _search(self, when):
+        return np.searchsorted(self.dates_sorted, np.datetime64(when), side="left")
+
+    def _slice(self, start, end):
+        # Whole days: start at 00:00 of ``start``, stop before 00:00 of the day after ``end``
+        return self._search(pd.Timestamp(start)), self._search(pd.Timestamp(end) + pd.Timedelta(days=1))
+
+    def _counts(self, lo, hi, freq):
+        return _bucket_counts(self.dates_sorted[lo:hi], self.resolved_sorted[lo:hi], freq)
+
+    def positions(self, start, end):
+        """Row positions dated within [start, end], in original row order"""
+        lo, hi = self._slice(start, end)
+        return np.sort(self.positions_sorted[lo:hi])
+
+    def count(self, start, end):
+        lo, hi = self._slice(start, end)
+        return hi - lo
+
+    def trend(self, bucket, start, end):
+        """Issues/Open/Resolved counts per period for rows dated within [start, end], as ``trend_for``"""
+        freq = BUCKETS[bucket]
+        lo, hi = self._slice(start, end)
+        start, stop = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+        # Whole periods run from the first period start at or after ``start``
+        # to the last one at or before ``stop``
+        first = pd.Period(start, freq=freq)
+        first = first.start_time if first.start_time == start else (first + 1).start_time
+        last = pd.Period(stop, freq=freq).start_time
+        if first >= last:
+            return self._counts(lo, hi, freq)
+
+        mid_lo, mid_hi = self._search(first), self._search(last)
+        whole = self.buckets[bucket]
+        return pd.concat([
+            self._counts(lo, mid_lo, freq),
+            whole.loc[first:last - pd.Timedelta(days=1)],
+            self._counts(mid_hi, hi, freq),
+        ])
+
+
+def date_index_for(lease, column, status_column=None):
+    """Index for a stored dataset, built once and shared by every session"""
+    def build(table):
+        status = None
+        if status_column in table.column_names:
+            status = table.column(status_column).to_pandas()
+        return DateIndex(table.column(column).to_pandas(), status)
+
+    return lease.derive(("date_index", column, status_column), build)
+
+
+def trend_for(df, column, status_column, bucket):
+    """Issues/Open/Resolved counts computed directly from (already filtered) rows"""
+    dates = _as_datetime64(df[column])
+    valid = ~np.isnat(dates)
+    resolved = np.zeros(int(valid.sum()), dtype=bool)
+    if status_column in df.columns:
+        resolved = is_resolved(df[status_column])[valid]
+    return _bucket_counts(dates[valid], resolved, BUCKETS[bucket])
+
+
+def clamp_range(picked, first, last):
+    """A date_input range kept within [first, last]; the full range if it doesn't overlap it"""
+    if not picked or picked[0] > last or picked[-1] < first:
+        return first, last
+    return tuple(min(max(day, first), last) for day in picked)
+
+
+def period_range(period, first, last, today=None):
+    """(start, end) dates for a PERIODS preset; None for Custom Range"""
+    today = today or pd.Timestamp.today().date()
+    if period == "All Dates":
+        return first, last
+    if period == "This Week":
+        return today - pd.Timedelta(days=today.weekday()), today
+    if period == "This Month":
+        return today.replace(day=1), today
+    if period == "Last 30 Days":
+        return today - pd.Timedelta(days=29), today
+    return None
@@ -0,0 +1,111 @@
+"""Partitioned export: one file (or sheet) per teacher, class, ... in a single zip."""
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+# Label -> file extension
+EXPORT_FORMATS = {
+    "CSV files": "csv",
+    "Parquet files": "parquet",
+    "Excel workbook (one sheet each)": "xlsx",
+}
+
+MAX_SHEET_NAME = 31
+
+# File/sheet name for rows with no value in the partition column
+BLANK = "Blank"
+
+
+def _safe_name(value, taken, limit=None):
+    """File/sheet-safe, unique name for a partition value"""
+    name = BLANK if value is None else re.sub(r"[^\w\- .]+", "_", str(value)).strip(" ._") or BLANK
+    if limit:
+        name = name[:limit]
+    base, n = name, 2
+    while name.lower() in taken:
+        suffix = f" ({n})"
+        name = (base[:limit - len(suffix)] if limit else base) + suffix
+        n += 1
+    taken.add(name.lower())
+    return name
+
+
+def split_by(df, column):
+    """Arrow table plus {value: row positions}, from one dictionary-encoding pass.
+
+    Rows with no value are kept as their own partition, keyed None. (pandas
+    drops that group for dictionary columns even with ``dropna=False``.)
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    values = table.column(column)
+    if not pa.types.is_dictionary(values.type):
+        values = pc.dictionary_encode(values)
+    values = values.combine_chunks()
+
+    codes = values.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    order = np.argsort(codes, kind="stable")
+    present, starts = np.unique(codes[order], return_index=True)
+    dictionary = values.dictionary.to_pylist()
+    groups = {
+        None if code < 0 else dictionary[code]: positions
+        for code, positions in zip(present, np.split(order, starts[1:]))
+    }
+    # Blank partition last
+    return table, dict(sorted(groups.items(), key=lambda item: (item[0] is None, str(item[0]))))
+
+
+def _write_csv(part):
+    buffer = io.BytesIO()
+    pacsv.write_csv(part, buffer)
+    return buffer.getvalue()
+
+
+def _write_parquet(part):
+    buffer = io.BytesIO()
+    pq.write_table(part, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def _write_workbook(table, groups):
+    """Streaming (write-only) workbook with one sheet per partition"""
+    workbook = Workbook(write_only=True)
+    taken = set()
+    for value, positions in groups.items():
+        part = table.take(positions)
+        sheet = workbook.create_sheet(_safe_name(value, taken, MAX_SHEET_NAME))
+        sheet.append(part.column_names)
+        for row in zip(*(column.to_pylist() for column in part.columns)):
+            sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def partitioned_zip(df, column, fmt, max_workers=None):
+    """Zip of ``df`` split by ``column``; returns (zip bytes, partition count)"""
+    table, groups = split_by(df, column)
+    out = io.BytesIO()
+
+    with zipfile.ZipFile(out, "w") as archive:
+        if fmt == "xlsx":
+            archive.writestr(f"by_{_safe_name(column, set())}.xlsx", _write_workbook(table, groups))
+        else:
+            writer = _write_csv if fmt == "csv" else _write_parquet
+            # Arrow's take/CSV/Parquet writers release the GIL, so partitions encode in parallel
+            with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+                encoded = pool.map(lambda positions: writer(table.take(positions)), groups.values())
+                taken = set()
+                for value, data in zip(groups, encoded):
+                    compress = zipfile.ZIP_DEFLATED if fmt == "csv" else zipfile.ZIP_STORED
+                    archive.writestr(f"{_safe_name(value, taken)}.{fmt}", data, compress_type=compress)
+
+    return out.getvalue(), len(groups)
@@ -0,0 +1,147 @@
+"""Loading uploaded issue files into the shared dataset store."""
+import io
+
+import pandas as pd
+import pyarrow as pa
+from openpyxl import load_workbook
+
+from utils.csv_arrow import iter_csv, read_csv, read_csv_lenient
+from utils.data_store import combined_key, content_key, get_store
+from utils.merge import merge_tables
+from utils.schema import apply_schema, check_upload
+
+# Row batches used when a file is parsed progressively; the first is small
+# so a preview can be shown almost immediately
+FIRST_BATCH_ROWS = 1000
+BATCH_ROWS = 20000
+
+# Schema metadata: malformed CSV lines left out by the lenient reader
+SKIPPED_LINES = b"gw_skipped_lines"
+
+
+def to_arrow(df):
+    """Convert a parsed DataFrame to an Arrow table.
+
+    Excel columns often mix numbers and text (e.g. classes ``9`` and ``"9A"``);
+    Arrow needs one type per column, so such columns are stored as strings.
+    """
+    df.columns = [str(c) for c in df.columns]
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def read_upload(name, data):
+    """Parse raw upload bytes into an Arrow table"""
+    if name.endswith('.csv'):
+        try:
+            return read_csv(data)
+        except (pa.ArrowInvalid, UnicodeDecodeError):
+            df = read_csv_lenient(data)
+            table = to_arrow(df)
+            if not df.attrs["skipped_lines"]:
+                return table
+            metadata = {**(table.schema.metadata or {}), SKIPPED_LINES: str(df.attrs["skipped_lines"]).encode()}
+            return table.replace_schema_metadata(metadata)
+    else:
+        df = pd.read_excel(io.BytesIO(data))
+    return to_arrow(df)
+
+
+def skipped_lines(table):
+    """How many malformed lines were left out when the file was read"""
+    return int((table.schema.metadata or {}).get(SKIPPED_LINES, 0))
+
+
+def iter_upload(name, data):
+    """Parse upload bytes as a sequence of Arrow tables (small first batch)"""
+    if name.endswith('.csv'):
+        yield from iter_csv(data)
+    elif name.endswith('.xlsx'):
+        yield from _iter_xlsx(data)
+    else:
+        # Legacy .xls has no streaming reader
+        yield read_upload(name, data)
+
+
+def _iter_xlsx(data):
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _column_names(header)
+        width = len(columns)
+
+        batch, size = [], FIRST_BATCH_ROWS
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= size:
+                yield to_arrow(pd.DataFrame(batch, columns=columns))
+                batch, size = [], BATCH_ROWS
+        if batch:
+            yield to_arrow(pd.DataFrame(batch, columns=columns))
+    finally:
+        workbook.close()
+
+
+def _column_names(header):
+    """Header cells as unique column names, the way pandas names them"""
+    names, seen = [], {}
+    for i, cell in enumerate(header):
+        name = f"Unnamed: {i}" if cell is None else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def dataset_key(data, schema=None):
+    """Store key for upload bytes as parsed under ``schema``"""
+    key = content_key(data)
+    return key if schema is None else combined_key([key, schema.name])
+
+
+def load_data(file, schema=None):
+    """Load an uploaded file, parsing it only if no session has done so already.
+
+    With a ``schema``, the header is validated first (raising SchemaError
+    before any full parse) and aliased/typed columns are normalised.
+    """
+    data = file.getvalue()
+    store = get_store()
+    key = dataset_key(data, schema)
+    if schema is None:
+        return store.lease(key, lambda: read_upload(file.name, data))
+
+    lease = store.get(key)
+    if lease is not None:
+        return lease
+    plan = check_upload(file.name, data, schema)
+    return store.lease(key, lambda: apply_schema(read_upload(file.name, data), plan))
+
+
+def merge_data(leases):
+    """Stack several loaded files into one stored table, aligned on a unified schema"""
+    if len(leases) == 1:
+        return leases[0]
+
+    return get_store().lease(
+        combined_key([lease.key for lease in leases]),
+        lambda: merge_tables([lease.table for lease in leases])
+    )
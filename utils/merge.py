@@ -0,0 +1,174 @@
+"""Schema-aligned merging of uploaded files.
+
+Monthly exports of the same sheet drift: a column is renamed ``class``
+instead of ``Class``, moved, missing, or read as integers in one file and
+text in another. Stacking such files as-is gives half-empty duplicate
+columns and object upcasts. ``merge_tables`` first works out one merged
+schema from the files' schemas alone - matching names case- and
+whitespace-insensitively and promoting types by fixed rules - then aligns
+each table to it. Only columns whose type actually changes are cast; all
+other column chunks are reused as they are, and dictionary columns end up
+sharing one dictionary. ``merge_report`` describes what was changed for
+each file.
+"""
+from dataclasses import dataclass, field
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.schema import normalise_name
+
+
+@dataclass
+class FileDiff:
+    """How one file's columns were mapped onto the merged schema"""
+    name: str
+    rows: int
+    renamed: dict = field(default_factory=dict)    # header in file -> merged name
+    missing: list = field(default_factory=list)    # merged columns the file lacks (left blank)
+    cast: dict = field(default_factory=dict)       # merged name -> (file type, merged type), as type_label()s
+    reordered: bool = False
+
+    @property
+    def clean(self):
+        return not (self.renamed or self.missing or self.cast or self.reordered)
+
+
+def _is_text(typ):
+    return pa.types.is_string(typ) or pa.types.is_large_string(typ)
+
+
+def _is_text_dictionary(typ):
+    return pa.types.is_dictionary(typ) and _is_text(typ.value_type)
+
+
+def type_label(typ):
+    """Plain-language name of an Arrow type, as shown in merge reports"""
+    if _is_text(typ) or _is_text_dictionary(typ):
+        return "text"
+    if pa.types.is_integer(typ):
+        return "whole number"
+    if pa.types.is_floating(typ) or pa.types.is_decimal(typ):
+        return "number"
+    if pa.types.is_timestamp(typ) or pa.types.is_date(typ):
+        return "date"
+    if pa.types.is_boolean(typ):
+        return "yes/no"
+    return str(typ)
+
+
+def promote(types):
+    """Merged type for a column read as ``types`` in different files.
+
+    Nulls take any type; integers widen to int64, and to float64 next to
+    floats; dates and timestamps become timestamps at the finest unit;
+    text dictionaries stay dictionaries (plain text joins them). Anything
+    else falls back to strings, which every value can be cast to.
+    """
+    types = set(types) - {pa.null()}
+    if not types:
+        return pa.null()
+    if len(types) == 1:
+        return types.pop()
+
+    if all(_is_text(t) or _is_text_dictionary(t) for t in types):
+        if any(pa.types.is_dictionary(t) for t in types):
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.large_string() if any(pa.types.is_large_string(t) for t in types) else pa.string()
+    if all(pa.types.is_integer(t) for t in types):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        return pa.float64()
+    if all(pa.types.is_timestamp(t) or pa.types.is_date(t) for t in types):
+        zones = {t.tz for t in types if pa.types.is_timestamp(t)}
+        if len(zones) <= 1:
+            units = [t.unit for t in types if pa.types.is_timestamp(t)]
+            unit = next((u for u in ("ns", "us", "ms", "s") if u in units), "ms")
+            return pa.timestamp(unit, tz=zones.pop() if zones else None)
+    return pa.string()
+
+
+def unify_schemas(schemas):
+    """(merged schema, per-file {merged column position: file column position})"""
+    names, types, sources = {}, {}, []
+    for schema in schemas:
+        source = {}
+        for i, column in enumerate(schema):
+            key = normalise_name(column.name)
+            # First file's spelling wins; a repeat within one file stays separate
+            while key in source:
+                key = (key, i)
+            names.setdefault(key, column.name)
+            types.setdefault(key, []).append(column.type)
+            source[key] = i
+        positions = {key: n for n, key in enumerate(names)}
+        sources.append({positions[key]: i for key, i in source.items()})
+
+    merged = pa.schema([pa.field(names[key], promote(types[key])) for key in names])
+    return merged, sources
+
+
+def _cast(column, typ):
+    if column.type == typ:
+        return column
+    if pa.types.is_null(column.type):
+        return pa.chunked_array([pa.nulls(len(column), typ)])
+    if pa.types.is_dictionary(typ):
+        if pa.types.is_dictionary(column.type):
+            return column.cast(typ)
+        return pc.cast(column, typ.value_type).dictionary_encode().cast(typ)
+    try:
+        return column.cast(typ)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        if not _is_text(typ):
+            raise
+        values = column.to_pandas()
+        return pa.array(values.where(values.isna(), values.astype(str)), type=typ, from_pandas=True)
+
+
+def align(table, schema, source):
+    """``table`` with ``schema``'s columns in order: renamed, cast, or blank if absent"""
+    columns = []
+    for n, merged in enumerate(schema):
+        i = source.get(n)
+        if i is None:
+            columns.append(pa.chunked_array([pa.nulls(table.num_rows, merged.type)]))
+        else:
+            columns.append(_cast(table.column(i), merged.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def merge_tables(tables):
+    """Stack tables on their unified schema; unchanged column chunks are not copied"""
+    if len(tables) == 1:
+        return tables[0]
+    schema, sources = unify_schemas([table.schema for table in tables])
+    merged = pa.concat_tables([align(table, schema, source) for table, source in zip(tables, sources)])
+    if any(pa.types.is_dictionary(column.type) for column in schema):
+        # One dictionary per column instead of one per file
+        merged = merged.unify_dictionaries()
+    return merged
+
+
+def merge_report(names, tables):
+    """A FileDiff per table, from the schemas alone"""
+    schema, sources = unify_schemas([table.schema for table in tables])
+    report = []
+    for name, table, source in zip(names, tables, sources):
+        diff = FileDiff(name, table.num_rows)
+        for n, merged in enumerate(schema):
+            i = source.get(n)
+            if i is None:
+                diff.missing.append(merged.name)
+                continue
+            column = table.schema.field(i)
+            if column.name != merged.name:
+                diff.renamed[column.name] = merged.name
+            # Storage-only changes (int32 -> int64, text -> dictionary text) aren't listed
+            labels = (type_label(column.type), type_label(merged.type))
+            if labels[0] != labels[1] and not pa.types.is_null(column.type):
+                diff.cast[merged.name] = labels
+        positions = [source[n] for n in sorted(source)]
+        diff.reordered = positions != sorted(positions)
+        report.append(diff)
+    return report
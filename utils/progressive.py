@@ -0,0 +1,188 @@
+"""Background parsing of uploads with a live, growing preview.
+
+``start_ingest`` checks each upload's header against the page schema,
+hands the valid ones to a worker thread and returns at once (after waiting
+briefly for the first rows). The page reads
+``job.status()`` on every rerun: while parsing it gets a preview of every
+row parsed so far, and once finished the same store leases ``load_data``
+would have returned. Changing or clearing the upload set cancels the
+running job.
+"""
+import threading
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+
+from utils.data_store import get_store
+from utils.ingest import dataset_key, iter_upload, read_upload
+from utils.merge import merge_tables
+from utils.schema import apply_schema, check_upload
+
+# How long the first rerun waits for the header and first rows
+FIRST_ROWS_WAIT = 1.0
+POLL_SECONDS = 1.0
+
+
+@dataclass
+class IngestStatus:
+    done: bool
+    version: int
+    rows: int
+    files_total: int
+    current_file: str = None
+    loaded: list = field(default_factory=list)   # (file name, lease)
+    errors: list = field(default_factory=list)   # (file name, message)
+    preview: object = None                       # Arrow-backed DataFrame while parsing
+
+
+class IngestJob:
+    """Parses a set of uploads on a worker thread, publishing partial results"""
+
+    def __init__(self, signature, uploads, store, schema=None):
+        self.signature = signature
+        self._schema = schema
+        self._uploads = list(enumerate(uploads))
+        self._files_total = len(uploads)
+        self._store = store
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._first_rows = threading.Event()
+
+        self._version = 0
+        self._done = False
+        self._current = None
+        self._loaded = []    # (upload position, file name, lease)
+        self._errors = []
+        self._partial = []
+
+        self._thread = threading.Thread(target=self._run, name="ingest", daemon=True)
+
+    def start(self):
+        # Files another session already parsed are available right away, and
+        # files with a bad header are rejected before any parsing starts
+        remaining = []
+        for i, (name, data) in self._uploads:
+            lease = self._store.get(dataset_key(data, self._schema))
+            if lease is not None:
+                self._loaded.append((i, name, lease))
+                continue
+            plan = None
+            if self._schema is not None:
+                try:
+                    plan = check_upload(name, data, self._schema)
+                except Exception as e:
+                    self._errors.append((name, str(e)))
+                    continue
+            remaining.append((i, (name, data, plan)))
+        self._uploads = remaining
+
+        if remaining:
+            self._thread.start()
+            self._first_rows.wait(FIRST_ROWS_WAIT)
+        else:
+            self._done = True
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def version(self):
+        return self._version
+
+    def status(self):
+        with self._lock:
+            loaded = [(name, lease) for _, name, lease in sorted(self._loaded, key=lambda x: x[0])]
+            partial = list(self._partial)
+            status = IngestStatus(
+                done=self._done,
+                version=self._version,
+                rows=sum(lease.num_rows for _, lease in loaded) + sum(t.num_rows for t in partial),
+                files_total=self._files_total,
+                current_file=self._current,
+                loaded=loaded,
+                errors=list(self._errors),
+            )
+        if not status.done:
+            tables = [lease.table for _, lease in loaded] + partial
+            if tables:
+                status.preview = merge_tables(tables).to_pandas(types_mapper=pd.ArrowDtype)
+        return status
+
+    def _publish(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._version += 1
+
+    def _run(self):
+        for i, (name, data, plan) in self._uploads:
+            if self._cancelled.is_set():
+                return
+            self._publish(_current=name, _partial=[])
+            try:
+                table = self._parse(name, data, plan)
+            except Exception as e:
+                self._publish(_errors=self._errors + [(name, str(e))], _partial=[])
+                self._first_rows.set()
+                continue
+            # A file finished after cancelling isn't stored: nobody will read it
+            if table is None or self._cancelled.is_set():
+                return
+            lease = self._store.lease(dataset_key(data, self._schema), lambda: table)
+            self._publish(_loaded=self._loaded + [(i, name, lease)], _partial=[])
+        self._publish(_done=True, _current=None)
+        self._first_rows.set()
+
+    def _parse(self, name, data, plan):
+        """Parse one file batch by batch; None if cancelled"""
+        def parsed(table):
+            return table if plan is None else apply_schema(table, plan)
+
+        batches = []
+        try:
+            for batch in iter_upload(name, data):
+                if self._cancelled.is_set():
+                    return None
+                batches.append(parsed(batch))
+                self._publish(_partial=list(batches))
+                self._first_rows.set()
+        except Exception:
+            # Streaming readers can trip on files the full readers handle
+            # (e.g. a type change deep into a CSV); parse it in one go instead
+            self._publish(_partial=[])
+            return parsed(read_upload(name, data))
+        return merge_tables(batches) if batches else parsed(read_upload(name, data))
+
+
+def upload_signature(uploaded_files):
+    return tuple((f.name, f.size, f.file_id) for f in uploaded_files)
+
+
+def start_ingest(slot, uploaded_files, schema=None):
+    """This session's ingest job for ``uploaded_files``, restarting it if the set changed"""
+    key = f"_ingest_job_{slot}"
+    signature = upload_signature(uploaded_files)
+    job = st.session_state.get(key)
+    if job is None or job.signature != signature:
+        if job is not None:
+            job.cancel()
+        uploads = [(f.name, f.getvalue()) for f in uploaded_files]
+        job = IngestJob(signature, uploads, get_store(), schema).start()
+        st.session_state[key] = job
+    return job
+
+
+def cancel_ingest(slot):
+    """Stop and forget this session's ingest job, e.g. once its files are removed"""
+    job = st.session_state.pop(f"_ingest_job_{slot}", None)
+    if job is not None:
+        job.cancel()
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def rerun_on_progress(job, seen_version):
+    """Rerun the page whenever the job publishes something new"""
+    if job.version != seen_version:
+        st.rerun()
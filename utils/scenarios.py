@@ -0,0 +1,205 @@
+"""Saved costing scenarios for the Profit & Loss calculator.
+
+A scenario is every input of the calculator (salaries and months, other
+expenses, division students and fees, existing-school figures) stored as
+one JSON row in a local SQLite database, indexed by school and save date.
+``profit_and_loss`` recomputes the calculator's outputs for any number of
+scenarios at once: inputs become one numpy matrix per group and each
+output is a single array expression, so comparing dozens of plans costs
+about the same as computing one.
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB = Path(os.environ.get("GW_SCENARIO_DB", ROOT / "scenarios.sqlite3"))
+
+# "Total Cost" on the Calculation tab is priced for this many students
+TOTAL_COST_STUDENTS = 425
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    inputs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_school_saved_at ON scenarios (school, saved_at);
+CREATE INDEX IF NOT EXISTS scenarios_saved_at ON scenarios (saved_at);
+"""
+
+
+@dataclass(frozen=True)
+class Scenario:
+    id: int
+    name: str
+    school: str
+    saved_at: str   # ISO timestamp
+    inputs: dict    # widget key -> value
+
+    @property
+    def label(self):
+        return f"#{self.id} {self.name} ({self.school}, {self.saved_at[:10]})"
+
+
+@dataclass(frozen=True)
+class CostingLayout:
+    """Widget keys of the calculator's inputs, grouped the way the P&L uses them"""
+    management: tuple   # (salary key, months key) per role
+    academics: tuple    # (salary key, months key) per role
+    other: tuple        # expense keys
+    divisions: tuple    # (students key, fees key) per division
+    existing_divisions: tuple   # existing school's student count keys (only feed its total)
+    existing_students: str
+    existing_revenue: str
+    existing_cost: str
+
+    @property
+    def keys(self):
+        pairs = self.management + self.academics + self.divisions
+        return [k for pair in pairs for k in pair] + list(self.other) + list(self.existing_divisions) + [
+            self.existing_students, self.existing_revenue, self.existing_cost
+        ]
+
+
+def _row(row):
+    return Scenario(row[0], row[1], row[2], row[3], json.loads(row[4]))
+
+
+class ScenarioStore:
+    """SQLite-backed scenarios; safe to share between sessions"""
+
+    COLUMNS = "id, name, school, saved_at, inputs"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+
+    def save(self, name, school, inputs):
+        """Store a scenario; returns its ID"""
+        saved_at = datetime.datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO scenarios (name, school, saved_at, inputs) VALUES (?, ?, ?, ?)",
+                (name.strip(), school.strip(), saved_at, json.dumps(inputs, sort_keys=True)),
+            )
+        return cursor.lastrowid
+
+    def get(self, scenario_id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {self.COLUMNS} FROM scenarios WHERE id = ?", (scenario_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No scenario #{scenario_id}")
+        return _row(row)
+
+    def clone(self, scenario_id, name, school=None):
+        """Copy a scenario's inputs under a new name; returns the new ID"""
+        source = self.get(scenario_id)
+        return self.save(name, school or source.school, source.inputs)
+
+    def find(self, school=None, start=None, end=None):
+        """Scenarios for a school (all if None) saved between two dates, newest first"""
+        clauses, params = [], []
+        if school is not None:
+            clauses.append("school = ?")
+            params.append(school)
+        if start is not None:
+            clauses.append("saved_at >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            # Whole days: everything before the start of the day after ``end``
+            clauses.append("saved_at < ?")
+            params.append((end + datetime.timedelta(days=1)).isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self.COLUMNS} FROM scenarios {where} ORDER BY saved_at DESC, id DESC", params
+            ).fetchall()
+        return [_row(row) for row in rows]
+
+    def schools(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT school FROM scenarios ORDER BY school")]
+
+
+@st.cache_resource
+def get_scenario_store():
+    """The scenario database shared by all sessions in this server process"""
+    return ScenarioStore(DEFAULT_DB)
+
+
+def _matrix(inputs, keys):
+    """(scenarios x keys) float array; missing inputs count as 0"""
+    values = [[inp.get(k) or 0 for k in keys] for inp in inputs]
+    return np.array(values, dtype=float).reshape(len(inputs), len(keys))
+
+
+def _per(numerator, denominator):
+    # x / 0 is shown as 0 on the Calculation tab
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def profit_and_loss(inputs, layout):
+    """The Calculation tab's outputs for each inputs dict, as one row per scenario"""
+    mgmt = _matrix(inputs, [k for pair in layout.management for k in pair]).reshape(len(inputs), -1, 2)
+    acad = _matrix(inputs, [k for pair in layout.academics for k in pair]).reshape(len(inputs), -1, 2)
+    divisions = _matrix(inputs, [k for pair in layout.divisions for k in pair]).reshape(len(inputs), -1, 2)
+    other = _matrix(inputs, layout.other)
+    existing = _matrix(inputs, [layout.existing_students, layout.existing_revenue, layout.existing_cost])
+
+    total_mgmt_cost = (mgmt[:, :, 0] * mgmt[:, :, 1]).sum(axis=1)
+    total_acad_cost = (acad[:, :, 0] * acad[:, :, 1]).sum(axis=1)
+    total_other = other.sum(axis=1)
+    grand_total_cost = total_mgmt_cost + total_acad_cost + total_other
+
+    students, fees = divisions[:, :, 0], divisions[:, :, 1]
+    total_students = students.sum(axis=1)
+    total_revenue = (students * fees).sum(axis=1)
+    fees_avg = fees.mean(axis=1)
+
+    per_student_cost = _per(grand_total_cost, total_students)
+    revenue_per_student = _per(total_revenue, total_students)
+    profit_per_student = revenue_per_student - per_student_cost
+    total_profit = total_revenue - grand_total_cost
+
+    ex_students, ex_revenue, ex_cost = existing.T
+    ex_profit_stu = _per(ex_revenue, ex_students) - _per(ex_cost, ex_students)
+    ex_total_profit = ex_revenue - ex_cost
+
+    # Breakeven is only defined for plans that make a profit per student
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breakeven = np.trunc((grand_total_cost + ex_total_profit) / fees_avg) + 1
+    breakeven = np.where(profit_per_student > 0, breakeven, np.nan)
+
+    return pd.DataFrame({
+        "Management Cost": total_mgmt_cost,
+        "Academics Cost": total_acad_cost,
+        "Other Expenses": total_other,
+        "Total Cost": grand_total_cost,
+        "Students": total_students,
+        "Revenue": total_revenue,
+        "Per Student Revenue": revenue_per_student,
+        "Per Student Costing": per_student_cost,
+        "Per Student Profit": profit_per_student,
+        "Total Profit": total_profit,
+        "Existing Per Student Profit": ex_profit_stu,
+        "Existing Total Profit": ex_total_profit,
+        "Breakeven Students": breakeven,
+        "Students That Can Leave": ex_students - breakeven,
+        "Total Cost With Payout": np.trunc(per_student_cost * TOTAL_COST_STUDENTS + ex_total_profit),
+        "Profit Per Student After All Cost": np.trunc(profit_per_student - ex_profit_stu),
+    })
@@ -0,0 +1,148 @@
+"""Per-page upload schemas, checked against the header before a full parse.
+
+``check_upload`` reads only the header row of a file, so an upload missing
+a required column is rejected in milliseconds instead of after
+``load_data`` has parsed all of it. The returned plan maps aliased
+headers (e.g. ``Class`` -> ``Issue In Class``) and is applied to the parsed
+Arrow table by ``apply_schema``, which coerces column types in one
+vectorised cast per column. Low-cardinality text columns (classes,
+subjects, teachers, statuses) are declared ``category`` and stored
+dictionary-encoded, so each distinct value is kept once.
+"""
+import io
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from openpyxl import load_workbook
+
+from utils.csv_arrow import sample_csv
+
+
+class SchemaError(ValueError):
+    """An upload doesn't match the page's schema"""
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    aliases: tuple = ()
+    dtype: str = "string"   # "string", "category", "number" or "datetime"
+    required: bool = False
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    columns: tuple
+
+
+@dataclass
+class SchemaPlan:
+    schema: Schema
+    rename: dict = field(default_factory=dict)   # header in file -> schema name
+
+
+TEACHER_ISSUE_SCHEMA = Schema("teacher_issues", (
+    Column("Issue In Class", aliases=("Class",), dtype="category", required=True),
+    Column("Teachers Name", aliases=("Teacher Name", "Teacher", "Teachers"), dtype="category", required=True),
+    Column("Issue In Subject", aliases=("Subject",), dtype="category"),
+    Column("Issue Type", aliases=("Type",)),
+    Column("Final Status", aliases=("Status",), dtype="category"),
+))
+
+STUDENT_ISSUE_SCHEMA = Schema("student_issues", (
+    Column("Class", aliases=("Issue In Class",), dtype="category", required=True),
+    Column("Subject", aliases=("Issue In Subject",), dtype="category", required=True),
+    Column("Resolver Teacher", aliases=("Teachers Name", "Teacher Name", "Teacher"), dtype="category"),
+))
+
+
+def normalise_name(name):
+    """Column name compared case- and whitespace-insensitively"""
+    return " ".join(str(name).split()).casefold()
+
+
+def sniff(name, data, rows=0):
+    """Header plus the first ``rows`` rows of an upload, without parsing the rest"""
+    if name.endswith('.csv'):
+        return sample_csv(data, rows)
+    if name.endswith('.xlsx'):
+        workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            it = workbook.worksheets[0].iter_rows(values_only=True, max_row=rows + 1)
+            header = next(it, None)
+            if header is None:
+                return pd.DataFrame()
+            columns = [f"Unnamed: {i}" if c is None else str(c) for i, c in enumerate(header)]
+            sample = [tuple(r[:len(columns)]) + (None,) * (len(columns) - len(r)) for r in it]
+            return pd.DataFrame(sample, columns=columns)
+        finally:
+            workbook.close()
+    return pd.read_excel(io.BytesIO(data), nrows=rows)
+
+
+def match_columns(columns, schema):
+    """Rename map from the file's headers to schema names; raises SchemaError"""
+    by_norm = {}
+    for col in columns:
+        by_norm.setdefault(normalise_name(col), col)
+
+    rename, missing = {}, []
+    for column in schema.columns:
+        # The schema's own name wins over an alias when a file has both
+        for candidate in (column.name,) + column.aliases:
+            source = by_norm.get(normalise_name(candidate))
+            if source is not None and source not in rename:
+                if source != column.name:
+                    rename[source] = column.name
+                break
+        else:
+            if column.required:
+                missing.append(column.name)
+
+    if missing:
+        found = ", ".join(map(str, columns)) or "none"
+        raise SchemaError(f"missing required column(s) {', '.join(missing)} (found: {found})")
+    return rename
+
+
+def check_upload(name, data, schema):
+    """Validate an upload's header against ``schema``"""
+    header = sniff(name, data)
+    return SchemaPlan(schema, match_columns(list(header.columns), schema))
+
+
+def _coerce(column, dtype):
+    if dtype == "category":
+        if pa.types.is_dictionary(column.type):
+            return column
+        return _coerce(column, "string").dictionary_encode()
+    if dtype == "string":
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            return column
+        try:
+            return pc.cast(column, pa.string())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            values = column.to_pandas()
+            return pa.array(values.where(values.isna(), values.astype(str)), type=pa.string(), from_pandas=True)
+    if dtype == "datetime":
+        if pa.types.is_timestamp(column.type):
+            return column
+        return pa.array(pd.to_datetime(column.to_pandas(), errors="coerce"), from_pandas=True)
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+        return column
+    return pa.array(pd.to_numeric(column.to_pandas(), errors="coerce"), from_pandas=True)
+
+
+def apply_schema(table, plan):
+    """Rename aliased columns and coerce schema columns to their declared types"""
+    metadata = table.schema.metadata
+    if plan.rename:
+        table = table.rename_columns([plan.rename.get(c, c) for c in table.column_names])
+    for column in plan.schema.columns:
+        if column.name in table.column_names:
+            i = table.schema.get_field_index(column.name)
+            table = table.set_column(i, column.name, _coerce(table.column(i), column.dtype))
+    return table.replace_schema_metadata(metadata)
@@ -0,0 +1,96 @@
+"""Saved analyses: merged data plus filter state under a short shareable ID.
+
+A snapshot is one zstd-compressed Parquet file in ``.snapshots/`` holding
+the merged table, with the page's widget state stored as JSON in the
+file's schema metadata. Opening a page with ``?snapshot=<id>`` memory-maps
+the file back into the dataset store and reapplies the filters, so an
+analysis survives a tab reload without re-uploading the workbooks.
+"""
+import datetime
+import json
+import re
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.data_store import combined_key, content_key, get_store
+
+ROOT = Path(__file__).resolve().parent.parent
+SNAPSHOT_DIR = ROOT / ".snapshots"
+STATE_KEY = b"gw_snapshot_state"
+ID_PATTERN = re.compile(r"^[0-9a-f]{10}$")
+
+
+def _encode(value):
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, dict):
+        return {key: _encode(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict) and "__date__" in value:
+        return datetime.date.fromisoformat(value["__date__"])
+    if isinstance(value, dict):
+        return {key: _decode(v) for key, v in value.items()}
+    if isinstance(value, list):
+        # date_input ranges come back as tuples, multiselects as lists
+        items = [_decode(v) for v in value]
+        return tuple(items) if items and all(isinstance(v, datetime.date) for v in items) else items
+    return value
+
+
+def snapshot_path(snapshot_id):
+    if not ID_PATTERN.match(str(snapshot_id)):
+        raise FileNotFoundError(f"'{snapshot_id}' is not a snapshot ID")
+    return SNAPSHOT_DIR / f"{snapshot_id}.parquet"
+
+
+def save_snapshot(lease, state):
+    """Write the leased table and ``state``; returns the snapshot ID"""
+    state_json = json.dumps(_encode(state), sort_keys=True)
+    snapshot_id = content_key(f"{lease.key}|{state_json}".encode())[:10]
+    path = snapshot_path(snapshot_id)
+    if not path.exists():
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        metadata = dict(lease.table.schema.metadata or {})
+        metadata[STATE_KEY] = state_json.encode()
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(lease.table.replace_schema_metadata(metadata), tmp, compression="zstd")
+        tmp.replace(path)
+    return snapshot_id
+
+
+def load_snapshot(snapshot_id):
+    """(lease on the snapshot's table, saved state); raises FileNotFoundError"""
+    path = snapshot_path(snapshot_id)
+    if not path.exists():
+        raise FileNotFoundError(f"Snapshot '{snapshot_id}' not found")
+
+    def read():
+        table = pq.read_table(path, memory_map=True)
+        return table.replace_schema_metadata({k: v for k, v in (table.schema.metadata or {}).items() if k != STATE_KEY})
+
+    state = json.loads(pq.read_schema(path).metadata[STATE_KEY])
+    lease = get_store().lease(combined_key(["snapshot", snapshot_id]), read)
+    return lease, _decode(state)
+
+
+def capture_state(keys):
+    """Current values of the given widget keys"""
+    return {key: st.session_state[key] for key in keys if key in st.session_state}
+
+
+def restore_snapshot(slot, snapshot_id):
+    """Lease on a snapshot's data; its widget state is applied once per session"""
+    lease, state = load_snapshot(snapshot_id)
+    applied = f"_snapshot_applied_{slot}"
+    if st.session_state.get(applied) != snapshot_id:
+        for key, value in state.items():
+            st.session_state[key] = value
+        st.session_state[applied] = snapshot_id
+    return lease